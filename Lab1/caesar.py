@@ -0,0 +1,73 @@
+"""
+Bulk Caesar cipher engine (English alphabet).
+
+Every shift gets its own translation table, built once, so a whole payload is
+processed by a single str.translate / bytes.translate call instead of one dict
+lookup per character. Byte buffers can also go through NumPy when it is
+installed.
+"""
+
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, bytes.translate is used instead
+    np = None
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LOWER = ALPHABET.lower()
+
+
+def _shifted(alphabet, shift):
+    shift %= len(alphabet)
+    return alphabet[shift:] + alphabet[:shift]
+
+
+@lru_cache(maxsize=None)
+def str_table(shift):
+    """Translation table for str.translate (case is preserved)"""
+    return str.maketrans(
+        ALPHABET + LOWER, _shifted(ALPHABET, shift) + _shifted(LOWER, shift)
+    )
+
+
+@lru_cache(maxsize=None)
+def bytes_table(shift):
+    """256-byte translation table for bytes.translate (ASCII letters only)"""
+    return bytes.maketrans(
+        (ALPHABET + LOWER).encode(),
+        (_shifted(ALPHABET, shift) + _shifted(LOWER, shift)).encode(),
+    )
+
+
+@lru_cache(maxsize=None)
+def array_table(shift):
+    """The same table as a uint8 lookup array for NumPy buffers"""
+    if np is None:
+        raise RuntimeError("NumPy is not installed")
+    return np.frombuffer(bytes_table(shift), dtype=np.uint8)
+
+
+def translate_array(buffer, shift):
+    """Encrypt a uint8 array (or any bytes-like object) with one NumPy gather"""
+    table = array_table(shift % 26)  # RuntimeError without NumPy
+    if not isinstance(buffer, np.ndarray):
+        buffer = np.frombuffer(buffer, dtype=np.uint8)
+    return table[buffer]
+
+
+def encrypt(data, shift):
+    """Encrypt str or bytes-like data in one call; non-letters pass through"""
+    shift %= 26
+    if isinstance(data, str):
+        return data.translate(str_table(shift))
+    if np is not None and isinstance(data, np.ndarray):
+        return translate_array(data, shift)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return data.translate(bytes_table(shift))
+
+
+def decrypt(data, shift):
+    """Inverse of encrypt"""
+    return encrypt(data, -shift)
@@ -1,55 +1,108 @@
-alpha = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-
-while True:
-    k2 = input("Please input k2\n").upper().replace(" ", "")
-    if len(k2) < 7:
-        print("k2 must be of length at least 7")
-        continue
-    if any(x not in alpha+" " for x in k2):
-        print("k2 can only contain letters of the Latin alphabet (and spaces that will be removed later)")
-        continue
-    break
-
-print(len(k2))
-dic = {}
-
-for i, char in enumerate(k2):
-    if char not in dic.values():
-        dic[len(dic)] = char
-
-for char in alpha:
-    if char not in dic.values():
-        dic[len(dic)] = char
-
-print(dic)
-
-dic_r = {char: i for i, char in enumerate(dic.values())}
-print(dic_r)
-
-while True:
-    choice = input("Enter 1 to encode, 2 to decode, or 3 to exit: ")
-    
-    if choice == '3':
-        print("Exiting the program.")
-        break
-    
-    if choice not in ['1', '2']:
-        print("Invalid choice. Please enter 1, 2, or 3.")
-        continue
-    
-    message = input("Enter text to process:\n").upper().replace(" ", "")
-    if not message.isalpha():
-        print("Text must be only in the English alphabet, no special characters.")
-        continue
-    
-    amount = input("Enter shift coefficient:\n")
-    amount = abs(int(amount)) % 26
-    
-    if choice == '1':
-        # Encoding
-        result = "".join([dic[(dic_r[x] + amount) % 26] for x in message])
-        print("Encoded message:", result)
+import argparse
+import sys
+
+from keyed import (
+    CHUNK_SIZE,
+    get_keyed_alphabet,
+    stream_translate,
+    validate_k2,
+)
+
+
+def read_k2():
+    while True:
+        k2 = input("Please input k2\n").upper().replace(" ", "")
+        error = validate_k2(k2)
+        if error:
+            print(error)
+            continue
+        return k2
+
+
+def interactive():
+    k2 = read_k2()
+    print(len(k2))
+
+    keyed = get_keyed_alphabet(k2)
+    print(dict(enumerate(keyed.keyed)))
+    print(keyed.position)
+
+    while True:
+        choice = input("Enter 1 to encode, 2 to decode, or 3 to exit: ")
+
+        if choice == '3':
+            print("Exiting the program.")
+            break
+
+        if choice not in ['1', '2']:
+            print("Invalid choice. Please enter 1, 2, or 3.")
+            continue
+
+        message = input("Enter text to process:\n").upper().replace(" ", "")
+        if not message.isalpha():
+            print("Text must be only in the English alphabet, no special characters.")
+            continue
+
+        amount = input("Enter shift coefficient:\n")
+        amount = abs(int(amount)) % 26
+
+        if choice == '1':
+            # Encoding
+            result = keyed.encode(message, amount)
+            print("Encoded message:", result)
+        else:
+            # Decoding
+            result = keyed.decode(message, amount)
+            print("Decoded message:", result)
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Keyed Caesar cipher. Without arguments runs interactively."
+    )
+    p.add_argument("mode", choices=["encode", "decode"])
+    p.add_argument("-k", "--k2", required=True, help="key k2 (at least 7 letters)")
+    p.add_argument("-s", "--shift", type=int, required=True)
+    p.add_argument("input", nargs="?", default="-", help="input file, '-' for stdin")
+    p.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    p.add_argument(
+        "--strip", action="store_true", help="drop non-letters instead of passing them through"
+    )
+    p.add_argument("--chunk-size", type=positive_int, default=CHUNK_SIZE)
+    # The input file may also come after the options: decode -k KEY -s 5 file
+    return p.parse_intermixed_args()
+
+
+def stream_main():
+    args = parse_args()
+    k2 = args.k2.upper().replace(" ", "")
+    error = validate_k2(k2)
+    if error:
+        raise SystemExit(error)
+
+    table = get_keyed_alphabet(k2).bytes_table(
+        abs(args.shift), decode=args.mode == "decode"
+    )
+    src = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        stream_translate(src, dst, table, args.strip, args.chunk_size)
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if dst is not sys.stdout.buffer:
+            dst.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        stream_main()
     else:
-        # Decoding
-        result = "".join([dic[(dic_r[x] - amount) % 26] for x in message])
-        print("Decoded message:", result)
\ No newline at end of file
+        interactive()
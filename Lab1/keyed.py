@@ -0,0 +1,97 @@
+"""
+Keyed-alphabet Caesar cipher on byte streams.
+
+The keyed alphabet (letters of k2 first, then the rest of the alphabet) is
+turned into 256-byte translation tables, so a chunk of any size is processed
+by one bytes.translate call. Input is read in fixed-size chunks, so memory use
+does not depend on the input size. KeyedAlphabet objects hold the tables of
+all 26 shifts and are kept in an LRU cache, so a key is never rebuilt while it
+stays in the cache.
+"""
+
+from functools import lru_cache
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CHUNK_SIZE = 1 << 20
+KEY_CACHE_SIZE = 1024
+
+# every byte that is not an ASCII letter (removed in strip mode)
+NON_LETTERS = bytes(
+    b for b in range(256) if not chr(b).isascii() or not chr(b).isalpha()
+)
+
+
+def validate_k2(k2):
+    """Return an error message for an invalid k2 (already uppercased) or an empty string"""
+    if len(k2) < 7:
+        return "k2 must be of length at least 7"
+    if any(x not in ALPHABET + " " for x in k2):
+        return "k2 can only contain letters of the Latin alphabet (and spaces that will be removed later)"
+    return ""
+
+
+def build_keyed_alphabet(k2):
+    """Letters of k2 without repetitions followed by the remaining letters"""
+    return "".join(dict.fromkeys(k2 + ALPHABET))
+
+
+class KeyedAlphabet:
+    """Keyed alphabet for one k2 with the tables for all 26 shifts precomputed"""
+
+    def __init__(self, k2):
+        self.k2 = k2
+        self.keyed = build_keyed_alphabet(k2)
+        self.position = {char: i for i, char in enumerate(self.keyed)}
+
+        source = self.keyed + self.keyed.lower()
+        self.encode_str = []
+        self.encode_bytes = []
+        self.decode_str = []
+        self.decode_bytes = []
+        for shift in range(26):
+            shifted = self.keyed[shift:] + self.keyed[:shift]
+            # lowercase input is encoded like uppercase
+            self.encode_str.append(str.maketrans(source, shifted + shifted))
+            self.encode_bytes.append(
+                bytes.maketrans(source.encode(), (shifted + shifted).encode())
+            )
+            unshifted = self.keyed[-shift:] + self.keyed[:-shift]
+            self.decode_str.append(str.maketrans(source, unshifted + unshifted))
+            self.decode_bytes.append(
+                bytes.maketrans(source.encode(), (unshifted + unshifted).encode())
+            )
+
+    def str_table(self, shift, decode=False):
+        return (self.decode_str if decode else self.encode_str)[shift % 26]
+
+    def bytes_table(self, shift, decode=False):
+        return (self.decode_bytes if decode else self.encode_bytes)[shift % 26]
+
+    def encode(self, text, shift):
+        return text.translate(self.encode_str[shift % 26])
+
+    def decode(self, text, shift):
+        return text.translate(self.decode_str[shift % 26])
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def get_keyed_alphabet(k2):
+    """KeyedAlphabet for k2, built only the first time the key is seen"""
+    return KeyedAlphabet(k2)
+
+
+def stream_translate(src, dst, table, strip=False, chunk_size=CHUNK_SIZE):
+    """Copy src to dst through the table, chunk by chunk; returns bytes read"""
+    # read(0) would end the copy at once and read(-1) would load everything
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    delete = NON_LETTERS if strip else b""
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        dst.write(chunk.translate(table, delete))
+    dst.flush()
+    return total
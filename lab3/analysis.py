@@ -0,0 +1,248 @@
+"""
+Cryptanalysis of the Romanian Vigenere cipher from main.py.
+
+The key length is estimated with the Kasiski examination and the index of
+coincidence, then every key letter is recovered with a chi-squared test
+against Romanian letter frequencies. Letter counts are kept per key-length
+candidate and per column and updated chunk by chunk, so long ciphertexts can
+be fed in pieces; with NumPy every update is one histogram per candidate.
+"""
+
+import re
+import sys
+from collections import Counter
+
+from main import VigenereCipher, np
+
+# Approximate Romanian letter frequencies (percent)
+ROMANIAN_FREQUENCIES = {
+    "A": 9.95, "Ă": 4.06, "Â": 0.65, "B": 1.07, "C": 4.47, "D": 3.41,
+    "E": 11.47, "F": 1.18, "G": 0.99, "H": 0.47, "I": 9.97, "Î": 0.99,
+    "J": 0.24, "K": 0.02, "L": 4.48, "M": 3.10, "N": 6.47, "O": 4.85,
+    "P": 3.01, "Q": 0.01, "R": 6.82, "S": 4.40, "Ș": 1.39, "T": 6.04,
+    "Ț": 1.00, "U": 6.20, "V": 1.23, "W": 0.03, "X": 0.27, "Y": 0.05,
+    "Z": 0.71,
+}
+
+MAX_KEY_LENGTH = 20
+KASISKI_SAMPLE = 1 << 20  # letters used for the Kasiski examination
+CHUNK_SIZE = 1 << 22
+
+ALPHABET = VigenereCipher.alphabet
+SIZE = VigenereCipher.alphabet_size
+EXPECTED = [ROMANIAN_FREQUENCIES[char] / 100 for char in ALPHABET]
+NOT_A_LETTER = re.compile(r"[^\x00-\x1e]")
+
+
+def letters_only(text):
+    """Letter numbers of text, every other character is skipped"""
+    cipher = VigenereCipher
+    if np is not None:
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        values = cipher.normalize_lut[np.minimum(codes, len(cipher.normalize_lut) - 1)]
+        return values[(values >= 0) & (values < SIZE)]
+    marked = NOT_A_LETTER.sub("", text.translate(cipher.normalize_table))
+    return marked.encode("ascii")
+
+
+def index_of_coincidence(counts):
+    n = sum(counts)
+    if n < 2:
+        return 0.0
+    return sum(c * (c - 1) for c in counts) / (n * (n - 1))
+
+
+def chi_squared_shifts(counts):
+    """Chi-squared statistic of a column for every possible key letter"""
+    n = sum(counts)
+    if np is not None:
+        counts = np.asarray(counts, dtype=np.float64)
+        expected = np.array(EXPECTED) * n
+        shifted = counts[(np.arange(SIZE)[:, None] + np.arange(SIZE)) % SIZE]
+        return (((shifted - expected) ** 2) / expected).sum(axis=1).tolist()
+
+    scores = []
+    for shift in range(SIZE):
+        score = 0.0
+        for j, p in enumerate(EXPECTED):
+            expected = p * n
+            score += (counts[(j + shift) % SIZE] - expected) ** 2 / expected
+        scores.append(score)
+    return scores
+
+
+def kasiski_scores(letters, max_key_length=MAX_KEY_LENGTH):
+    """Kasiski examination over repeated trigrams
+
+    For every candidate length returns the share of distances between
+    consecutive repeats divisible by it, scaled so that random text scores
+    about 1.0 (length 1 always scores 1.0).
+    """
+    if len(letters) < 4:
+        return {length: 0.0 for length in range(1, max_key_length + 1)}
+
+    if np is not None:
+        letters = np.asarray(letters, dtype=np.int32)
+        trigrams = letters[:-2] * SIZE * SIZE + letters[1:-1] * SIZE + letters[2:]
+        order = np.argsort(trigrams, kind="stable")
+        ordered = trigrams[order]
+        repeated = ordered[1:] == ordered[:-1]
+        distances = order[1:][repeated] - order[:-1][repeated]
+        total = len(distances)
+        return {
+            length: float(np.count_nonzero(distances % length == 0)) * length / total
+            if total
+            else 0.0
+            for length in range(1, max_key_length + 1)
+        }
+
+    last_seen = {}
+    distances = Counter()
+    for i in range(len(letters) - 2):
+        trigram = letters[i : i + 3]
+        if trigram in last_seen:
+            distances[i - last_seen[trigram]] += 1
+        last_seen[trigram] = i
+    total = sum(distances.values())
+    scores = {}
+    for length in range(1, max_key_length + 1):
+        divisible = sum(n for d, n in distances.items() if d % length == 0)
+        scores[length] = divisible * length / total if total else 0.0
+    return scores
+
+
+class VigenereAnalyzer:
+    """Incremental key-length and key recovery for the Romanian Vigenere cipher"""
+
+    def __init__(self, max_key_length=MAX_KEY_LENGTH):
+        self.max_key_length = max_key_length
+        self.length = 0
+        self.sample = []
+        self.sample_length = 0
+        # counts[L][column] -> letter histogram, for every candidate length L
+        if np is not None:
+            self.counts = {
+                L: np.zeros((L, SIZE), dtype=np.int64)
+                for L in range(1, max_key_length + 1)
+            }
+        else:
+            self.counts = {
+                L: [Counter() for _ in range(L)] for L in range(1, max_key_length + 1)
+            }
+
+    def update(self, text):
+        """Add the next piece of ciphertext (non-letters are ignored)"""
+        letters = letters_only(text)
+        n = len(letters)
+        offset = self.length
+
+        if np is not None:
+            positions = np.arange(offset, offset + n)
+            for L, counts in self.counts.items():
+                counts += np.bincount(
+                    (positions % L) * SIZE + letters, minlength=L * SIZE
+                ).reshape(L, SIZE)
+        else:
+            for L, counters in self.counts.items():
+                for column, counter in enumerate(counters):
+                    counter.update(letters[(column - offset) % L :: L])
+
+        if self.sample_length < KASISKI_SAMPLE:
+            self.sample.append(letters[: KASISKI_SAMPLE - self.sample_length])
+            self.sample_length += len(self.sample[-1])
+        self.length += n
+
+    def column_counts(self, key_length):
+        """Letter histograms of every column as lists of 31 counts"""
+        if np is not None:
+            return self.counts[key_length].tolist()
+        return [[c[i] for i in range(SIZE)] for c in self.counts[key_length]]
+
+    def key_length_scores(self):
+        """(length, mean column IC, Kasiski score) for every candidate length"""
+        if np is not None:
+            sample = np.concatenate(self.sample) if self.sample else np.zeros(0, np.int16)
+        else:
+            sample = b"".join(self.sample)
+        kasiski = kasiski_scores(sample, self.max_key_length)
+
+        scores = []
+        for L in range(1, self.max_key_length + 1):
+            columns = self.column_counts(L)
+            ic = sum(index_of_coincidence(c) for c in columns) / L
+            scores.append((L, ic, kasiski.get(L, 0.0)))
+        return scores
+
+    def key_length(self, scores=None):
+        """Smallest candidate supported by both the IC and the Kasiski scores
+
+        Multiples of the real key length have the same high IC and about
+        the same Kasiski score, so the candidates are the lengths within 10%
+        of the best IC. A divisor of the real length that gets there by
+        chance scores only a fraction of the Kasiski maximum and is skipped;
+        without repeated trigrams the IC alone decides.
+        """
+        if not self.length:
+            raise ValueError("Not enough ciphertext: no letters to analyze")
+        scores = scores or self.key_length_scores()
+        best = max(ic for _, ic, _ in scores)
+        candidates = [(L, kasiski) for L, ic, kasiski in scores if ic >= 0.9 * best]
+        best_kasiski = max(kasiski for _, kasiski in candidates)
+        return min(L for L, kasiski in candidates if kasiski >= 0.75 * best_kasiski)
+
+    def recover_key(self, key_length=None):
+        key_length = key_length or self.key_length()
+        if self.length < key_length:
+            raise ValueError(
+                f"Not enough ciphertext: {self.length} letters for a key of length {key_length}"
+            )
+        key = []
+        for counts in self.column_counts(key_length):
+            chi = chi_squared_shifts(counts)
+            key.append(ALPHABET[chi.index(min(chi))])
+        return "".join(key)
+
+
+def analyze_text(ciphertext, max_key_length=MAX_KEY_LENGTH):
+    """Return (key_length, key) for a ciphertext held in memory"""
+    analyzer = VigenereAnalyzer(max_key_length)
+    for start in range(0, len(ciphertext), CHUNK_SIZE):
+        analyzer.update(ciphertext[start : start + CHUNK_SIZE])
+    key_length = analyzer.key_length()
+    return key_length, analyzer.recover_key(key_length)
+
+
+def read_file(path, max_key_length=MAX_KEY_LENGTH, chunk_size=CHUNK_SIZE):
+    """VigenereAnalyzer fed with the ciphertext file chunk by chunk"""
+    analyzer = VigenereAnalyzer(max_key_length)
+    with open(path, encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            analyzer.update(chunk)
+    return analyzer
+
+
+def analyze_file(path, max_key_length=MAX_KEY_LENGTH, chunk_size=CHUNK_SIZE):
+    """Return (key_length, key) reading the ciphertext file chunk by chunk"""
+    analyzer = read_file(path, max_key_length, chunk_size)
+    key_length = analyzer.key_length()
+    return key_length, analyzer.recover_key(key_length)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        raise SystemExit("Usage: analysis.py <ciphertext file>")
+    analyzer = read_file(sys.argv[1])
+    try:
+        scores = analyzer.key_length_scores()
+        key_length = analyzer.key_length(scores)
+        key = analyzer.recover_key(key_length)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{'length':>6} {'IC':>8} {'Kasiski':>8}")
+    for L, ic, kasiski in scores:
+        print(f"{L:6} {ic:8.4f} {kasiski:8.2f}")
+    print(f"Estimated key length: {key_length}")
+    print(f"Recovered key: {key}")
@@ -1,95 +1,258 @@
-class VigenereCipher:
-    def __init__(self):
-        # Romanian alphabet with 31 letters (indexed 0-30)
-        self.alphabet = "AĂÂBCDEFGHIÎJKLMNOPQRSȘTȚUVWXYZ"
-        self.alphabet_size = len(self.alphabet)
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 
-        # Dictionaries for quick conversion
-        self.char_to_num = {char: i for i, char in enumerate(self.alphabet)}
-        self.num_to_char = {i: char for i, char in enumerate(self.alphabet)}
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the tabula recta is used instead
+    np = None
 
-    def validate_text(self, text):
-        """Validate that text contains only allowed characters"""
-        allowed_chars = set(self.alphabet + self.alphabet.lower() + " ")
-
-        for char in text:
-            if char not in allowed_chars:
-                return (
-                    False,
-                    f"The character '{char}' is not allowed. Use only Romanian letters (A-Z, Ă, Â, Î, Ș, Ț) and spaces.",
-                )
-        return True, ""
 
-    def validate_key(self, key):
-        """Validate encryption key"""
+def _normalize_table(alphabet):
+    """str.translate table: letters of both cases -> chr(number), space -> chr(31)
+
+    Control characters become U+FFFF, so after the translation the first
+    character outside chr(0)-chr(31) is the first invalid one.
+    """
+    table = {code: "\uffff" for code in range(32)}
+    for i, char in enumerate(alphabet):
+        table[ord(char)] = table[ord(char.lower())] = chr(i)
+    table[ord(" ")] = chr(len(alphabet))
+    return table
+
+
+def _normalize_lut(alphabet):
+    """The same mapping as a NumPy lookup array over code points (-1 = invalid)"""
+    letters = alphabet + alphabet.lower()
+    lut = np.full(max(map(ord, letters)) + 2, -1, dtype=np.int16)
+    for i, char in enumerate(alphabet):
+        lut[ord(char)] = lut[ord(char.lower())] = i
+    lut[ord(" ")] = len(alphabet)
+    return lut
+
+
+def _tabula_recta(size, sign):
+    """Row k maps letter number i to (i + sign * k), as bytes.translate tables"""
+    numbers = bytes(range(size))
+    return [
+        bytes.maketrans(numbers, bytes((i + sign * k) % size for i in range(size)))
+        for k in range(size)
+    ]
+
+
+# Batches at least this large are spread over a process pool
+PROCESS_THRESHOLD = 100_000
+PROCESS_CHUNK_SIZE = 20_000
+
+
+def _process_chunk(args):
+    """Worker entry point for the process pool"""
+    return VigenereCipher().process_many(*args)
+
+
+class VigenereCipher:
+    # Romanian alphabet with 31 letters (indexed 0-30)
+    alphabet = "AĂÂBCDEFGHIÎJKLMNOPQRSȘTȚUVWXYZ"
+    alphabet_size = len(alphabet)
+
+    # Dictionaries for quick conversion
+    char_to_num = {char: i for i, char in enumerate(alphabet)}
+    num_to_char = dict(enumerate(alphabet))
+
+    # Lookup tables shared by all instances, built once at import time.
+    # Without NumPy letter number i is stored as the byte i (a space as 31)
+    space_index = alphabet_size
+    normalize_table = _normalize_table(alphabet)
+    invalid_char = re.compile(r"[^\x00-\x1f]")
+    encrypt_rows = _tabula_recta(alphabet_size, 1)
+    decrypt_rows = _tabula_recta(alphabet_size, -1)
+    to_letter = str.maketrans("".join(map(chr, range(alphabet_size))), alphabet)
+
+    if np is not None:
+        normalize_lut = _normalize_lut(alphabet)
+        alphabet_codes = np.array(list(map(ord, alphabet)), dtype=np.uint32)
+
+    def normalize(self, text):
+        """Validate, uppercase, drop spaces and encode text in one pass
+
+        Returns (indices, error_position): letter numbers as a NumPy array
+        (or bytes without NumPy) and the position of the first
+        invalid character, -1 when the text is valid.
+        """
+        if np is not None:
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            values = self.normalize_lut[
+                np.minimum(codes, len(self.normalize_lut) - 1)
+            ]
+            invalid = np.flatnonzero(values < 0)
+            if invalid.size:
+                return None, int(invalid[0])
+            return values[values != self.space_index], -1
+
+        marked = text.translate(self.normalize_table)
+        match = self.invalid_char.search(marked)
+        if match:
+            return None, match.start()
+        return marked.replace(chr(self.space_index), "").encode("ascii"), -1
+
+    def char_error(self, char):
+        return f"The character '{char}' is not allowed. Use only Romanian letters (A-Z, Ă, Â, Î, Ș, Ț) and spaces."
+
+    def prepare_key(self, key):
+        """Validate the key and return its letter numbers: (key_nums, error)"""
         if len(key) < 7:
-            return False, "The key must have at least 7 characters!"
+            return None, "The key must have at least 7 characters!"
 
-        valid, msg = self.validate_text(key)
-        if not valid:
-            return False, f"The key contains invalid characters: {msg}"
+        indices, position = self.normalize(key)
+        if position >= 0:
+            return None, f"The key contains invalid characters: {self.char_error(key[position])}"
 
         # Check that the key has no spaces
         if " " in key:
-            return False, "The key cannot contain spaces!"
+            return None, "The key cannot contain spaces!"
+
+        return list(indices), ""
 
+    def validate_text(self, text):
+        """Validate that text contains only allowed characters"""
+        _, position = self.normalize(text)
+        if position >= 0:
+            return False, self.char_error(text[position])
         return True, ""
 
+    def validate_key(self, key):
+        """Validate encryption key"""
+        _, msg = self.prepare_key(key)
+        return not msg, msg
+
     def prepare_text(self, text):
         """Prepare text: remove spaces and convert to uppercase"""
         text = text.replace(" ", "")
         text = text.upper()
         return text
 
-    def encrypt(self, plaintext, key):
-        """Encrypt message using Vigenere cipher"""
-        valid, msg = self.validate_text(plaintext)
-        if not valid:
-            return None, msg
+    def apply_key(self, indices, key_nums, sign):
+        """Add (sign=1) or subtract (sign=-1) the periodic key in one batch"""
+        key_length = len(key_nums)
 
-        valid, msg = self.validate_key(key)
-        if not valid:
-            return None, msg
+        if np is not None:
+            key_vector = np.resize(np.array(key_nums, dtype=np.int16), len(indices))
+            result = (indices + sign * key_vector) % self.alphabet_size
+            return self.alphabet_codes[result].tobytes().decode("utf-32-le")
 
-        plaintext = self.prepare_text(plaintext)
-        key = self.prepare_text(key)
+        # Every key position shifts a strided slice of the text with one row
+        # of the tabula recta; the slices are then interleaved back
+        rows = self.encrypt_rows if sign > 0 else self.decrypt_rows
+        result = bytearray(len(indices))
+        for i, key_num in enumerate(key_nums):
+            result[i::key_length] = indices[i::key_length].translate(rows[key_num])
+        return result.decode("ascii").translate(self.to_letter)
 
-        ciphertext = []
-        key_length = len(key)
+    def encrypt(self, plaintext, key):
+        """Encrypt message using Vigenere cipher"""
+        indices, position = self.normalize(plaintext)
+        if position >= 0:
+            return None, self.char_error(plaintext[position])
 
-        for i, char in enumerate(plaintext):
-            if char in self.char_to_num:
-                plaintext_num = self.char_to_num[char]
-                key_num = self.char_to_num[key[i % key_length]]
-                encrypted_num = (plaintext_num + key_num) % self.alphabet_size
-                ciphertext.append(self.num_to_char[encrypted_num])
+        key_nums, msg = self.prepare_key(key)
+        if msg:
+            return None, msg
 
-        return "".join(ciphertext), ""
+        return self.apply_key(indices, key_nums, 1), ""
 
     def decrypt(self, ciphertext, key):
         """Decrypt message using Vigenere cipher"""
-        valid, msg = self.validate_text(ciphertext)
-        if not valid:
-            return None, msg
+        indices, position = self.normalize(ciphertext)
+        if position >= 0:
+            return None, self.char_error(ciphertext[position])
 
-        valid, msg = self.validate_key(key)
-        if not valid:
+        key_nums, msg = self.prepare_key(key)
+        if msg:
             return None, msg
 
-        ciphertext = self.prepare_text(ciphertext)
-        key = self.prepare_text(key)
-
-        plaintext = []
-        key_length = len(key)
-
-        for i, char in enumerate(ciphertext):
-            if char in self.char_to_num:
-                ciphertext_num = self.char_to_num[char]
-                key_num = self.char_to_num[key[i % key_length]]
-                decrypted_num = (ciphertext_num - key_num) % self.alphabet_size
-                plaintext.append(self.num_to_char[decrypted_num])
-
-        return "".join(plaintext), ""
+        return self.apply_key(indices, key_nums, -1), ""
+
+    def apply_key_many(self, items, key_nums, sign):
+        """Apply one key to many letter-number sequences with one apply_key call
+
+        Every message is padded to a multiple of the key length, so the key
+        restarts at the beginning of each message inside the joined batch.
+        """
+        key_length = len(key_nums)
+        parts = []
+        starts = []
+        position = 0
+        for indices in items:
+            pad = -len(indices) % key_length
+            parts.append(indices)
+            if pad:
+                parts.append(np.zeros(pad, dtype=np.int16) if np is not None else bytes(pad))
+            starts.append(position)
+            position += len(indices) + pad
+
+        if not parts:
+            return []
+        joined = np.concatenate(parts) if np is not None else b"".join(parts)
+        text = self.apply_key(joined, key_nums, sign)
+        return [text[start : start + len(indices)] for start, indices in zip(starts, items)]
+
+    def process_many(self, messages, keys, sign):
+        """Encrypt (sign=1) or decrypt (sign=-1) a batch in this process
+
+        Messages are grouped by key, so each key is validated and tiled once.
+        """
+        results = [None] * len(messages)
+        groups = {}
+        for i, (message, key) in enumerate(zip(messages, keys)):
+            indices, position = self.normalize(message)
+            if position >= 0:
+                results[i] = (None, self.char_error(message[position]))
+                continue
+            positions, items = groups.setdefault(key, ([], []))
+            positions.append(i)
+            items.append(indices)
+
+        for key, (positions, items) in groups.items():
+            key_nums, msg = self.prepare_key(key)
+            if msg:
+                for i in positions:
+                    results[i] = (None, msg)
+                continue
+            for i, text in zip(positions, self.apply_key_many(items, key_nums, sign)):
+                results[i] = (text, "")
+        return results
+
+    def run_many(self, messages, keys, sign, workers=None, threshold=PROCESS_THRESHOLD):
+        messages = list(messages)
+        keys = [keys] * len(messages) if isinstance(keys, str) else list(keys)
+        if len(keys) != len(messages):
+            raise ValueError("The number of keys must match the number of messages")
+
+        workers = workers or os.cpu_count() or 1
+        if len(messages) < threshold or workers == 1:
+            return self.process_many(messages, keys, sign)
+
+        chunks = [
+            (messages[i : i + PROCESS_CHUNK_SIZE], keys[i : i + PROCESS_CHUNK_SIZE], sign)
+            for i in range(0, len(messages), PROCESS_CHUNK_SIZE)
+        ]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_process_chunk, chunks):
+                results.extend(part)
+        return results
+
+    def encrypt_many(self, plaintexts, keys, workers=None, threshold=PROCESS_THRESHOLD):
+        """Encrypt many messages under one shared key or one key per message
+
+        Returns a list of (ciphertext, error) tuples in input order. Batches of
+        at least `threshold` messages are split over `workers` processes.
+        """
+        return self.run_many(plaintexts, keys, 1, workers, threshold)
+
+    def decrypt_many(self, ciphertexts, keys, workers=None, threshold=PROCESS_THRESHOLD):
+        """Decrypt many messages; the counterpart of encrypt_many"""
+        return self.run_many(ciphertexts, keys, -1, workers, threshold)
 
 
 def print_alphabet_table(cipher):
@@ -0,0 +1,136 @@
+"""
+DES key schedule.
+
+PC-1 splits the 64-bit key into the 28-bit halves C0 and D0, every round
+rotates them left by the number of positions from the `iteration` table and
+PC-2 selects the 48-bit round key. The halves are kept as integers, and the
+permutations are done with one precomputed lookup table per input byte.
+"""
+
+from functools import lru_cache
+
+# Number of left shifts of C and D in every round
+iteration = {
+    1: 1,
+    2: 1,
+    3: 2,
+    4: 2,
+    5: 2,
+    6: 2,
+    7: 2,
+    8: 2,
+    9: 1,
+    10: 2,
+    11: 2,
+    12: 2,
+    13: 2,
+    14: 2,
+    15: 2,
+    16: 1,
+}
+
+PC1 = [
+    57, 49, 41, 33, 25, 17, 9,
+    1, 58, 50, 42, 34, 26, 18,
+    10, 2, 59, 51, 43, 35, 27,
+    19, 11, 3, 60, 52, 44, 36,
+    63, 55, 47, 39, 31, 23, 15,
+    7, 62, 54, 46, 38, 30, 22,
+    14, 6, 61, 53, 45, 37, 29,
+    21, 13, 5, 28, 20, 12, 4,
+]
+
+PC2 = [
+    14, 17, 11, 24, 1, 5,
+    3, 28, 15, 6, 21, 10,
+    23, 19, 12, 4, 26, 8,
+    16, 7, 27, 20, 13, 2,
+    41, 52, 31, 37, 47, 55,
+    30, 40, 51, 45, 33, 48,
+    44, 49, 39, 56, 34, 53,
+    46, 42, 50, 36, 29, 32,
+]
+
+MASK28 = (1 << 28) - 1
+SCHEDULE_CACHE_SIZE = 1024
+
+
+def permutation_tables(table, in_bits):
+    """One 256-entry lookup table per input byte for a DES permutation table
+
+    Positions in DES tables are 1-based and counted from the most
+    significant bit; the result of every lookup is already in place, so a
+    permutation is the OR of in_bits / 8 lookups.
+    """
+    out_bits = len(table)
+    tables = []
+    for byte in range(in_bits // 8):
+        lut = []
+        for value in range(256):
+            out = 0
+            for i, source in enumerate(table):
+                source -= 1
+                if source // 8 == byte and value >> (7 - source % 8) & 1:
+                    out |= 1 << (out_bits - 1 - i)
+            lut.append(out)
+        tables.append(lut)
+    return tables
+
+
+def permute(value, tables, in_bits):
+    out = 0
+    shift = in_bits - 8
+    for lut in tables:
+        out |= lut[(value >> shift) & 0xFF]
+        shift -= 8
+    return out
+
+
+PC1_TABLES = permutation_tables(PC1, 64)
+PC2_TABLES = permutation_tables(PC2, 56)
+
+
+def key_to_int(key):
+    """64-bit key as an int from bytes, a hex string or an int"""
+    if isinstance(key, int):
+        return key
+    if isinstance(key, str):
+        return int(key, 16)
+    if len(key) != 8:
+        raise ValueError("DES key must be 8 bytes long")
+    return int.from_bytes(key, "big")
+
+
+class DESKeySchedule:
+    """All 16 round keys (48-bit ints) of one DES key"""
+
+    def __init__(self, key):
+        self.key = key_to_int(key)
+
+        cd = permute(self.key, PC1_TABLES, 64)
+        c, d = cd >> 28, cd & MASK28
+
+        self.halves = [(c, d)]
+        subkeys = []
+        for i in range(1, 17):
+            shift = iteration[i]
+            c = ((c << shift) | (c >> (28 - shift))) & MASK28
+            d = ((d << shift) | (d >> (28 - shift))) & MASK28
+            self.halves.append((c, d))
+            subkeys.append(permute((c << 28) | d, PC2_TABLES, 56))
+
+        self.subkeys = tuple(subkeys)
+        self.decrypt_subkeys = self.subkeys[::-1]
+
+    @classmethod
+    def for_key(cls, key):
+        """Schedule from the cache, computed only the first time a key is used"""
+        return _cached_schedule(key_to_int(key))
+
+    def __repr__(self):
+        return f"DESKeySchedule({self.key:016X})"
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_schedule(key):
+    return DESKeySchedule(key)
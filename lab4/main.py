@@ -1,32 +1,12 @@
 import random
 
-iteration = {
-    1: 1,
-    2: 1,
-    3: 2,
-    4: 2,
-    5: 2,
-    6: 2,
-    7: 2,
-    8: 2,
-    9: 1,
-    10: 2,
-    11: 2,
-    12: 2,
-    13: 2,
-    14: 2,
-    15: 2,
-    16: 1,
-}
+from key_schedule import iteration
 
 print(iteration.keys())
 print(iteration[16])
 
-k_random = ""
-
-while len(k_random) < 56:
-    # добавляем случайно выбранный символ 0 или 1
-    k_random += str(random.randint(0, 1))
+# случайные 56 бит сразу, без посимвольной конкатенации
+k_random = format(random.getrandbits(56), "056b")
 
 print(len(k_random))
 print(k_random)
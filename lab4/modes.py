@@ -0,0 +1,266 @@
+"""
+ECB, CBC and CTR modes for the block ciphers of lab4, on files and streams.
+
+Input is read with readinto into one reused buffer, chunk by chunk, and every
+chunk is written out before the next one is read, so memory stays constant
+for any file size. ECB, CTR and CBC decryption do not depend on the previous
+chunk's output, so their chunks are spread over a process pool (with a
+bounded number of chunks in flight); CBC encryption is inherently
+sequential. ECB and CBC use PKCS#7 padding; CBC and CTR files start with the
+8-byte IV / initial counter.
+
+Usage (a 32 or 48 hex digit key selects 3DES):
+  python modes.py encrypt|decrypt --key <hex> [--mode cbc] [--workers N] <in> <out>
+"""
+
+import argparse
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from des import DES, np
+from tdes import TripleDES
+
+BLOCK_SIZE = 8
+CHUNK_SIZE = 1 << 20  # must be a multiple of BLOCK_SIZE
+MASK64 = (1 << 64) - 1
+MODES = ("ecb", "cbc", "ctr")
+
+
+def pad(data):
+    """PKCS#7 padding up to a multiple of the block size"""
+    n = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return bytes(data) + bytes([n]) * n
+
+
+def unpad(data):
+    if not data or len(data) % BLOCK_SIZE:
+        raise ValueError("Invalid padded data length")
+    n = data[-1]
+    if not 1 <= n <= BLOCK_SIZE or data[-n:] != bytes([n]) * n:
+        raise ValueError("Invalid PKCS#7 padding")
+    return data[:-n]
+
+
+def to_blocks(data):
+    if len(data) % BLOCK_SIZE:
+        raise ValueError("Data length is not a multiple of the block size")
+    if np is not None:
+        return np.frombuffer(data, dtype=">u8").astype(np.uint64)
+    return list(struct.unpack(f">{len(data) // BLOCK_SIZE}Q", data))
+
+
+def from_blocks(blocks):
+    if np is not None and isinstance(blocks, np.ndarray):
+        return blocks.astype(">u8").tobytes()
+    return struct.pack(f">{len(blocks)}Q", *blocks)
+
+
+def xor_bytes(a, b):
+    """XOR of two equally long byte strings as one big-int operation"""
+    x = int.from_bytes(a, "big") ^ int.from_bytes(b, "big")
+    return x.to_bytes(len(a), "big")
+
+
+def ecb_chunk(cipher, data, decrypt):
+    blocks = to_blocks(data)
+    if decrypt:
+        return from_blocks(cipher.decrypt_blocks(blocks))
+    return from_blocks(cipher.encrypt_blocks(blocks))
+
+
+def ctr_chunk(cipher, data, counter):
+    """XOR data with the keystream E(counter), E(counter + 1), ..."""
+    count = -(-len(data) // BLOCK_SIZE)
+    if np is not None:
+        counters = np.arange(count, dtype=np.uint64) + np.uint64(counter)
+    else:
+        counters = [(counter + i) & MASK64 for i in range(count)]
+    keystream = from_blocks(cipher.encrypt_blocks(counters))
+    return xor_bytes(data, keystream[: len(data)])
+
+
+def cbc_decrypt_chunk(cipher, data, previous):
+    """previous is the ciphertext block in front of this chunk (or the IV)"""
+    plain = from_blocks(cipher.decrypt_blocks(to_blocks(data)))
+    return xor_bytes(plain, previous + data[:-BLOCK_SIZE])
+
+
+def cbc_encrypt_chunk(cipher, data, previous):
+    """Sequential CBC encryption; returns (ciphertext, last block as int)"""
+    out = []
+    for block in to_blocks(data):
+        previous = cipher.encrypt_block(int(block) ^ previous)
+        out.append(previous)
+    return from_blocks(out), previous
+
+
+def read_full(src, view):
+    """readinto until the view is full or the input ends"""
+    total = 0
+    while total < len(view):
+        n = src.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+def read_chunks(src, chunk_size=CHUNK_SIZE):
+    """Yield (chunk, is_last) views of one reused buffer
+
+    The last chunk is shorter than chunk_size (possibly empty), so the
+    padding step always sees it. A view is only valid until the next one.
+    """
+    view = memoryview(bytearray(chunk_size))
+    while True:
+        n = read_full(src, view)
+        yield view[:n], n < chunk_size
+        if n < chunk_size:
+            return
+
+
+def ordered_map(func, jobs, workers):
+    """Run func over jobs in order, on a process pool when workers > 1
+
+    At most 2 * workers chunks are in flight, which keeps memory bounded.
+    """
+    if workers <= 1:
+        for args in jobs:
+            yield func(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for args in jobs:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def check_chunk_size(chunk_size):
+    # CTR advances the counter and CBC chains per whole block, so a chunk
+    # must never end in the middle of a block
+    if chunk_size <= 0 or chunk_size % BLOCK_SIZE:
+        raise ValueError(f"chunk_size must be a positive multiple of {BLOCK_SIZE}")
+
+
+def encrypt_stream(src, dst, cipher, mode="cbc", iv=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Encrypt src into dst; returns the IV / initial counter used (or None)"""
+    check_chunk_size(chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if mode != "ecb":
+        iv = int.from_bytes(os.urandom(BLOCK_SIZE), "big") if iv is None else iv
+        dst.write(iv.to_bytes(BLOCK_SIZE, "big"))
+
+    if mode == "cbc":
+        previous = iv
+        for chunk, last in read_chunks(src, chunk_size):
+            data = pad(chunk) if last else chunk
+            out, previous = cbc_encrypt_chunk(cipher, data, previous)
+            dst.write(out)
+        return iv
+
+    if mode == "ecb":
+        jobs = (
+            (cipher, pad(chunk) if last else bytes(chunk), False)
+            for chunk, last in read_chunks(src, chunk_size)
+        )
+        results = ordered_map(ecb_chunk, jobs, workers)
+    elif mode == "ctr":
+        results = ordered_map(ctr_chunk, _ctr_jobs(src, cipher, iv, chunk_size), workers)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    for out in results:
+        dst.write(out)
+    return iv
+
+
+def decrypt_stream(src, dst, cipher, mode="cbc", workers=None, chunk_size=CHUNK_SIZE):
+    check_chunk_size(chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if mode != "ecb":
+        header = src.read(BLOCK_SIZE)
+        if len(header) != BLOCK_SIZE:
+            raise ValueError("Input is too short to contain an IV")
+        iv = int.from_bytes(header, "big")
+
+    if mode == "ctr":
+        for out in ordered_map(ctr_chunk, _ctr_jobs(src, cipher, iv, chunk_size), workers):
+            dst.write(out)
+        return
+
+    if mode == "ecb":
+        jobs = ((cipher, bytes(chunk), True) for chunk, _ in read_chunks(src, chunk_size))
+        results = ordered_map(ecb_chunk, jobs, workers)
+    elif mode == "cbc":
+        results = ordered_map(cbc_decrypt_chunk, _cbc_jobs(src, cipher, header, chunk_size), workers)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    # The padding is in the last block, which is only known at the end
+    tail = b""
+    for out in results:
+        if not out:
+            continue
+        dst.write(tail)
+        dst.write(out[:-BLOCK_SIZE])
+        tail = out[-BLOCK_SIZE:]
+    dst.write(unpad(tail))
+
+
+def _ctr_jobs(src, cipher, counter, chunk_size):
+    for chunk, _ in read_chunks(src, chunk_size):
+        if chunk:
+            yield cipher, bytes(chunk), counter
+            counter = (counter + len(chunk) // BLOCK_SIZE) & MASK64
+
+
+def _cbc_jobs(src, cipher, previous, chunk_size):
+    for chunk, _ in read_chunks(src, chunk_size):
+        if chunk:
+            data = bytes(chunk)
+            yield cipher, data, previous
+            previous = data[-BLOCK_SIZE:]
+
+
+def encrypt_file(src_path, dst_path, cipher, mode="cbc", iv=None, workers=None, chunk_size=CHUNK_SIZE):
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        return encrypt_stream(src, dst, cipher, mode, iv, workers, chunk_size)
+
+
+def decrypt_file(src_path, dst_path, cipher, mode="cbc", workers=None, chunk_size=CHUNK_SIZE):
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        decrypt_stream(src, dst, cipher, mode, workers, chunk_size)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="DES file encryption")
+    p.add_argument("action", choices=["encrypt", "decrypt"])
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument(
+        "--key", required=True, help="key in hex: 16 digits for DES, 32 or 48 for 3DES"
+    )
+    p.add_argument("--mode", choices=MODES, default="cbc")
+    p.add_argument("--iv", help="IV / initial counter in hex (random by default)")
+    p.add_argument("--workers", type=int, default=None)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cipher = DES(args.key) if len(args.key) == 16 else TripleDES(args.key)
+    if args.action == "encrypt":
+        iv = int(args.iv, 16) if args.iv else None
+        encrypt_file(args.input, args.output, cipher, args.mode, iv, args.workers)
+    else:
+        decrypt_file(args.input, args.output, cipher, args.mode, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Пакетная проверка подписей: манифест (user, file, sig) -> JSON lines.
+
+Манифест — CSV (user,file,sig; заголовок необязателен) или JSON lines
+({"user": ..., "file": ..., "sig": ...}). Тройки читаются потоково и
+проверяются пачками в пуле потоков или процессов; в работе одновременно не
+больше 2 * workers пачек, порядок результатов совпадает с манифестом.
+Функция проверки одной тройки передаётся снаружи (main.verify_triple),
+так что сертификаты и открытые ключи берутся из кэша каждого работника.
+"""
+
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+BATCH_SIZE = 256
+
+
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        if first.lstrip().startswith("{"):
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    yield item["user"], item["file"], item["sig"]
+            return
+        for row in csv.reader(f):
+            if len(row) < 3 or row[0].startswith("#"):
+                continue
+            if row[0].strip().lower() == "user":  # заголовок
+                continue
+            yield row[0].strip(), row[1].strip(), row[2].strip()
+
+
+def _verify_chunk(verify, triples):
+    return [verify(*triple) for triple in triples]
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def verify_batch(
+    triples, verify, workers=None, processes=False, batch_size=BATCH_SIZE, initializer=None, initargs=()
+):
+    """Yield verify(user, file, sig) results in input order
+
+    initializer(*initargs) запускается в каждом работнике пула — например,
+    чтобы выбрать тот же бэкенд в дочерних процессах.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(triples, batch_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _verify_chunk(verify, chunk)
+        return
+
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_verify_chunk, verify, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_results(results, out):
+    """JSON lines в out; возвращает (всего, верных)"""
+    total = valid = 0
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        total += 1
+        valid += bool(result.get("valid"))
+    out.flush()
+    return total, valid
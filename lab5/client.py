@@ -0,0 +1,137 @@
+"""
+Тонкий клиент для `main.py serve`.
+
+Одно постоянное соединение, запросы — строки JSON; импортирует только
+стандартные модули, поэтому запуск и вызов занимают миллисекунды.
+
+Использование:
+  python client.py ping
+  python client.py sign <user> <file>...
+  python client.py verify <user> <file> <sig>
+  python client.py issue <user> [--key-type ed25519]
+  python client.py stats
+Адрес: --socket PATH (по умолчанию ./pki/ca/pki.sock, или PKI_SOCKET)
+или --port N (127.0.0.1). Для --port нужен токен сервера: --token-file
+(по умолчанию ./pki/ca/serve.token) или переменная PKI_TOKEN.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+DEFAULT_SOCKET = Path("pki") / "ca" / "pki.sock"
+DEFAULT_TOKEN_FILE = Path("pki") / "ca" / "serve.token"
+
+
+class PKIError(Exception):
+    pass
+
+
+class PKIClient:
+    def __init__(self, socket_path=None, port: int = None, token_file=None):
+        self.token = None
+        if port:
+            self.token = os.environ.get("PKI_TOKEN") or Path(token_file or DEFAULT_TOKEN_FILE).read_text().strip()
+            self.sock = socket.create_connection(("127.0.0.1", port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            path = socket_path or os.environ.get("PKI_SOCKET") or DEFAULT_SOCKET
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(str(path))
+        self.file = self.sock.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def call_many(self, requests) -> list:
+        # Все запросы отправляются сразу, ответы собираются по id
+        pending = {}
+        for request in requests:
+            request = dict(request, id=next(self._ids))
+            if self.token:
+                request["token"] = self.token
+            pending[request["id"]] = None
+            self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        order = list(pending)
+        for _ in order:
+            line = self.file.readline()
+            if not line:
+                raise PKIError("сервер закрыл соединение")
+            response = json.loads(line)
+            pending[response["id"]] = response
+        return [pending[i] for i in order]
+
+    def call(self, op: str, **params) -> dict:
+        response = self.call_many([dict(params, op=op)])[0]
+        if not response["ok"]:
+            raise PKIError(response["error"])
+        return response["result"]
+
+    def ping(self):
+        return self.call("ping")
+
+    def sign(self, username: str, filepath) -> str:
+        return self.call("sign", user=username, file=str(filepath))["sig"]
+
+    def verify(self, username: str, filepath, sigpath) -> bool:
+        return self.call("verify", user=username, file=str(filepath), sig=str(sigpath))["valid"]
+
+    def issue(self, username: str, key_type: str = None) -> dict:
+        params = {"key_type": key_type} if key_type else {}
+        return self.call("issue", user=username, **params)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("cmd", choices=["ping", "sign", "verify", "issue", "stats"])
+    p.add_argument("args", nargs="*")
+    p.add_argument("--socket")
+    p.add_argument("--port", type=int)
+    p.add_argument("--token-file")
+    p.add_argument("--key-type", help="issue: тип ключа (rsa2048, rsa3072, rsa4096, p256, ed25519)")
+    args = p.parse_args()
+    a = args.args
+
+    with PKIClient(args.socket, args.port, args.token_file) as client:
+        if args.cmd == "sign":
+            if len(a) < 2:
+                raise SystemExit("Usage: sign <username> <file> [<file> ...]")
+            requests = [{"op": "sign", "user": a[0], "file": f} for f in a[1:]]
+            responses = client.call_many(requests)
+        elif args.cmd == "verify":
+            if len(a) != 3:
+                raise SystemExit("Usage: verify <username> <file> <sig>")
+            responses = client.call_many([{"op": "verify", "user": a[0], "file": a[1], "sig": a[2]}])
+        elif args.cmd == "issue":
+            if len(a) != 1:
+                raise SystemExit("Usage: issue <username>")
+            request = {"op": "issue", "user": a[0]}
+            if args.key_type:
+                request["key_type"] = args.key_type
+            responses = client.call_many([request])
+        else:
+            responses = client.call_many([{"op": args.cmd}])
+
+    failed = False
+    for response in responses:
+        print(json.dumps(response, ensure_ascii=False))
+        failed |= not response["ok"] or response["result"].get("valid") is False
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
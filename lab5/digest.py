@@ -0,0 +1,35 @@
+"""
+Потоковое хэширование файлов (SHA-256) для подписи и проверки.
+
+Файл читается через readinto в буфер, который переиспользуется в пределах
+потока, поэтому и маленькие, и большие файлы хэшируются без лишних
+аллокаций и без чтения файла целиком в память. hashlib отпускает GIL на
+больших блоках, так что хэширование в нескольких потоках идёт параллельно.
+"""
+
+import hashlib
+import threading
+
+BUFFER_SIZE = 1 << 20
+
+_local = threading.local()
+
+
+def _buffer(size: int) -> memoryview:
+    view = getattr(_local, "view", None)
+    if view is None or len(view) != size:
+        view = memoryview(bytearray(size))
+        _local.view = view
+    return view
+
+
+def sha256_file(path, buffer_size: int = BUFFER_SIZE) -> bytes:
+    h = hashlib.sha256()
+    view = _buffer(buffer_size)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.digest()
@@ -0,0 +1,235 @@
+"""
+Бэкенд PKI внутри процесса (библиотека cryptography) — без запуска openssl.
+
+Генерация ключей, CSR, подписание сертификатов CA, подпись и проверка
+файлов (RSA, ECDSA P-256 или Ed25519 по SHA-256 файла, см. keytypes.py).
+Файлы (PEM, подписи) совместимы с бэкендом openssl.
+
+python inprocess.py — сравнение скорости подписи/проверки по типам ключей.
+"""
+
+import datetime
+import os
+import time
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa, utils
+from cryptography.x509.oid import NameOID
+
+import digest
+from keytypes import KEY_TYPES, parse_key_type
+from inventory import CertRecord
+
+
+def _name(common_name: str) -> x509.Name:
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def _write_private(path: Path, data: bytes):
+    path.write_bytes(data)
+    path.chmod(0o600)
+
+
+def new_private_key(key_type: str):
+    algorithm, bits = parse_key_type(key_type)
+    if algorithm == "rsa":
+        return rsa.generate_private_key(public_exponent=65537, key_size=bits)
+    if algorithm == "ec":
+        return ec.generate_private_key(ec.SECP256R1())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def _cert_hash(key):
+    # Ed25519 подписывает сертификаты без отдельного хэша
+    return None if isinstance(key, ed25519.Ed25519PrivateKey) else hashes.SHA256()
+
+
+def generate_key(path: Path, key_type: str):
+    pem, _ = generate_key_pem(key_type)
+    return save_private_key_pem(path, pem)
+
+
+def generate_key_pem(key_type: str):
+    # Для пула процессов: возвращает (PEM, время генерации в секундах)
+    start = time.perf_counter()
+    key = new_private_key(key_type)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return pem, time.perf_counter() - start
+
+
+def save_private_key_pem(path: Path, pem: bytes):
+    _write_private(path, pem)
+    return serialization.load_pem_private_key(pem, password=None)
+
+
+def load_private_key(path: Path):
+    return serialization.load_pem_private_key(Path(path).read_bytes(), password=None)
+
+
+def load_certificate(path: Path) -> x509.Certificate:
+    return x509.load_pem_x509_certificate(Path(path).read_bytes())
+
+
+def create_self_signed_ca(key, cert_path: Path, common_name: str, days: int):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    public_key = key.public_key()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(_name(common_name))
+        .issuer_name(_name(common_name))
+        .public_key(public_key)
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=days))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(public_key), critical=False)
+        .sign(key, _cert_hash(key))
+    )
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    return cert
+
+
+def create_csr(key, common_name: str, csr_path: Path):
+    csr = (
+        x509.CertificateSigningRequestBuilder()
+        .subject_name(_name(common_name))
+        .sign(key, _cert_hash(key))
+    )
+    csr_path.write_bytes(csr.public_bytes(serialization.Encoding.PEM))
+    return csr
+
+
+def issue_certificate(csr, ca_cert, ca_key, serial: int, days: int, cert_path: Path):
+    # Аналог `openssl x509 -req -CA ... -CAkey ... -set_serial ... -sha256`
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(csr.subject)
+        .issuer_name(ca_cert.subject)
+        .public_key(csr.public_key())
+        .serial_number(serial)
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=days))
+        .sign(ca_key, _cert_hash(ca_key))
+    )
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    return cert
+
+
+def sign_digest(key, file_digest: bytes) -> bytes:
+    # Подпись готового SHA-256 — то же, что key.sign(data, ..., hashes.SHA256());
+    # Ed25519 подписывает сам хэш как сообщение
+    if isinstance(key, rsa.RSAPrivateKey):
+        return key.sign(file_digest, padding.PKCS1v15(), utils.Prehashed(hashes.SHA256()))
+    if isinstance(key, ec.EllipticCurvePrivateKey):
+        return key.sign(file_digest, ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+    return key.sign(file_digest)
+
+
+def sign_file(key_path: Path, filepath: Path, sig_path: Path):
+    # Файл хэшируется потоково, в память целиком не читается
+    key = load_private_key(key_path)
+    signature = sign_digest(key, digest.sha256_file(filepath))
+    sig_path.write_bytes(signature)
+    return signature
+
+
+def certificate_public_key(cert_bytes: bytes):
+    # (открытый ключ, serial) за один разбор сертификата — для кэша ключей и проверки отзыва
+    cert = x509.load_pem_x509_certificate(cert_bytes)
+    return cert.public_key(), cert.serial_number
+
+
+def certificate_record(cert_bytes: bytes) -> CertRecord:
+    cert = x509.load_pem_x509_certificate(cert_bytes)
+    return CertRecord(
+        cert.serial_number,
+        "".join(f"/{attr.rfc4514_attribute_name}={attr.value}" for attr in cert.subject),
+        cert.not_valid_before_utc,
+        cert.not_valid_after_utc,
+        cert.fingerprint(hashes.SHA256()).hex(),
+    )
+
+
+def generate_crl(ca_cert, ca_key, revoked, crl_number: int, days: int, crl_path: Path):
+    # revoked — пары (serial, дата отзыва); аналог `openssl ca -gencrl`
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = (
+        x509.CertificateRevocationListBuilder()
+        .issuer_name(ca_cert.subject)
+        .last_update(now)
+        .next_update(now + datetime.timedelta(days=days))
+        .add_extension(x509.CRLNumber(crl_number), critical=False)
+    )
+    for serial, revoked_at in revoked:
+        builder = builder.add_revoked_certificate(
+            x509.RevokedCertificateBuilder()
+            .serial_number(serial)
+            .revocation_date(revoked_at)
+            .build()
+        )
+    crl = builder.sign(ca_key, _cert_hash(ca_key))
+    crl_path.write_bytes(crl.public_bytes(serialization.Encoding.PEM))
+    return crl
+
+
+def crl_serials(crl_bytes: bytes, ca_public_key) -> set:
+    crl = x509.load_pem_x509_crl(crl_bytes)
+    if not crl.is_signature_valid(ca_public_key):
+        raise ValueError("Подпись CRL неверна")
+    return {revoked.serial_number for revoked in crl}
+
+
+def verify_file(public_key, filepath: Path, sig_path: Path) -> bool:
+    return verify_digest(public_key, digest.sha256_file(filepath), Path(sig_path).read_bytes())
+
+
+def verify_digest(public_key, file_digest: bytes, signature: bytes) -> bool:
+    # Проверка по готовому SHA-256 (файл хэшируется потоково, см. digest.py)
+    try:
+        if isinstance(public_key, rsa.RSAPublicKey):
+            public_key.verify(signature, file_digest, padding.PKCS1v15(), utils.Prehashed(hashes.SHA256()))
+        elif isinstance(public_key, ec.EllipticCurvePublicKey):
+            public_key.verify(signature, file_digest, ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+        else:
+            public_key.verify(signature, file_digest)
+    except InvalidSignature:
+        return False
+    return True
+
+
+def benchmark(key_types=KEY_TYPES, seconds: float = 1.0):
+    """Подписей и проверок в секунду (по готовому SHA-256) и время генерации ключа"""
+    file_digest = os.urandom(32)
+    print(f"{'тип':10} {'генерация, мс':>14} {'подпись/с':>10} {'проверка/с':>11} {'подпись, байт':>14}")
+    for key_type in key_types:
+        start = time.perf_counter()
+        key = new_private_key(key_type)
+        keygen = time.perf_counter() - start
+        public_key = key.public_key()
+        signature = sign_digest(key, file_digest)
+        assert verify_digest(public_key, file_digest, signature)
+        rates = []
+        for op in (
+            lambda: sign_digest(key, file_digest),
+            lambda: verify_digest(public_key, file_digest, signature),
+        ):
+            count = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                for _ in range(10):
+                    op()
+                count += 10
+            rates.append(count / (time.perf_counter() - start))
+        print(f"{key_type:10} {keygen * 1000:14.1f} {rates[0]:10.0f} {rates[1]:11.0f} {len(signature):14}")
+
+
+if __name__ == "__main__":
+    benchmark()
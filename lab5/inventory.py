@@ -0,0 +1,189 @@
+"""
+Индекс выданных сертификатов в SQLite (pki/ca/inventory.sqlite3).
+
+Хранит subject, serial, notBefore/notAfter, SHA-256 отпечаток (DER) и
+признак отзыва, с индексами по срокам и subject, так что show-certs с
+фильтрами не читает PEM-файлы. Обновляется при create-user/revoke, а
+rebuild() сканирует папку сертификатов и разбирает только новые или
+изменённые файлы (по mtime/размеру).
+"""
+
+import datetime
+import os
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple
+
+SORT_COLUMNS = ("not_after", "not_before", "subject", "serial")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS certs (
+    serial      INTEGER PRIMARY KEY,
+    subject     TEXT NOT NULL,
+    not_before  TEXT NOT NULL,
+    not_after   TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    revoked     INTEGER NOT NULL DEFAULT 0,
+    revoked_at  TEXT,
+    path        TEXT UNIQUE,
+    mtime_ns    INTEGER,
+    size        INTEGER
+);
+CREATE INDEX IF NOT EXISTS certs_not_after ON certs (not_after);
+CREATE INDEX IF NOT EXISTS certs_subject ON certs (subject);
+CREATE INDEX IF NOT EXISTS certs_revoked ON certs (revoked, not_after);
+"""
+
+
+class CertRecord(NamedTuple):
+    serial: int
+    subject: str
+    not_before: datetime.datetime
+    not_after: datetime.datetime
+    fingerprint: str  # SHA-256 от DER, hex
+
+
+def _iso(when: datetime.datetime) -> str:
+    # Единый формат UTC: строки сортируются так же, как даты
+    return when.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _row(record: CertRecord, path, st) -> tuple:
+    return (
+        record.serial,
+        record.subject,
+        _iso(record.not_before),
+        _iso(record.not_after),
+        record.fingerprint,
+        str(path) if path else None,
+        st.st_mtime_ns if st else None,
+        st.st_size if st else None,
+    )
+
+
+class CertInventory:
+    def __init__(self, db_path: Path):
+        self.db = sqlite3.connect(str(db_path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM certs").fetchone()[0]
+
+    def add(self, record: CertRecord, path: Path = None):
+        self.add_many([(record, path)])
+
+    def add_many(self, items):
+        # items — пары (CertRecord, путь или None); для файла запоминаются
+        # mtime/размер, чтобы rebuild() не разбирал его повторно
+        self._upsert([_row(record, path, os.stat(path) if path else None) for record, path in items])
+
+    def _upsert(self, rows):
+        with self.db:
+            # Файл, перезаписанный сертификатом с другим serial, — новая запись
+            self.db.executemany(
+                "DELETE FROM certs WHERE path = ? AND serial != ?",
+                [(row[5], row[0]) for row in rows if row[5]],
+            )
+            # Признак отзыва при перезаписи записи не сбрасывается
+            self.db.executemany(
+                "INSERT INTO certs (serial, subject, not_before, not_after, fingerprint, path, mtime_ns, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (serial) DO UPDATE SET subject = excluded.subject,"
+                " not_before = excluded.not_before, not_after = excluded.not_after,"
+                " fingerprint = excluded.fingerprint, path = excluded.path,"
+                " mtime_ns = excluded.mtime_ns, size = excluded.size",
+                rows,
+            )
+
+    def mark_revoked(self, revoked):
+        # revoked — пары (serial, дата отзыва)
+        with self.db:
+            self.db.executemany(
+                "UPDATE certs SET revoked = 1, revoked_at = ? WHERE serial = ?",
+                [(_iso(when), serial) for serial, when in revoked],
+            )
+
+    def rebuild(self, certs_dir: Path, read_record, revoked=()):
+        """Синхронизировать индекс с папкой сертификатов
+
+        read_record(path) -> CertRecord вызывается только для новых и
+        изменённых файлов; записи удалённых файлов удаляются. Возвращает
+        (разобрано файлов, удалено записей).
+        """
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.db.execute(
+                "SELECT path, mtime_ns, size FROM certs WHERE path IS NOT NULL"
+            )
+        }
+        seen = set()
+        changed = []
+        with os.scandir(certs_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".pem") or not entry.is_file():
+                    continue
+                path = os.path.join(certs_dir, entry.name)
+                seen.add(path)
+                st = entry.stat()
+                if known.get(path) != (st.st_mtime_ns, st.st_size):
+                    changed.append((path, st))
+
+        self._upsert([_row(read_record(Path(path)), path, st) for path, st in changed])
+        gone = [(path,) for path in known.keys() - seen]
+        with self.db:
+            self.db.executemany("DELETE FROM certs WHERE path = ?", gone)
+        self.mark_revoked(revoked)
+        return len(changed), len(gone)
+
+    def query(
+        self,
+        subject: str = None,
+        status: str = None,
+        expires_within: float = None,
+        sort: str = "not_after",
+        desc: bool = False,
+        limit: int = None,
+    ):
+        """Записи индекса как кортежи (serial, subject, not_before, not_after,
+        fingerprint, revoked, path)
+
+        subject — шаблон LIKE (% и _); status — valid, revoked или expired;
+        expires_within — истекающие в ближайшие N дней (ещё не истёкшие).
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Неизвестное поле сортировки: {sort}")
+        now = datetime.datetime.now(datetime.timezone.utc)
+        where, params = [], []
+        if subject:
+            where.append("subject LIKE ?")
+            params.append(subject if subject.startswith("/") else f"/CN={subject}")
+        if status == "revoked":
+            where.append("revoked = 1")
+        elif status == "valid":
+            where.append("revoked = 0 AND not_after > ?")
+            params.append(_iso(now))
+        elif status == "expired":
+            where.append("not_after <= ?")
+            params.append(_iso(now))
+        if expires_within is not None:
+            where.append("not_after > ? AND not_after <= ?")
+            params += [_iso(now), _iso(now + datetime.timedelta(days=expires_within))]
+
+        sql = "SELECT serial, subject, not_before, not_after, fingerprint, revoked, path FROM certs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort} {'DESC' if desc else 'ASC'}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.db.execute(sql, params)
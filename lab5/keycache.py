@@ -0,0 +1,80 @@
+"""
+Кэш открытых ключей из сертификатов пользователей.
+
+Ключ кэша — (путь, mtime_ns, размер) сертификата: при попадании достаточно
+одного stat, сертификат не читается и не разбирается. При промахе файл
+читается, его SHA-256 (отпечаток) определяет запись: если тот же сертификат
+уже встречался (или сохранён на диске в persist_dir), ключ не извлекается
+заново. Замена сертификата меняет mtime/размер, и старая запись вытесняется
+по LRU. Таблицы защищены блокировкой, поэтому кэш можно использовать из
+нескольких потоков (загрузка ключа при промахе идёт вне блокировки).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+DEFAULT_MAXSIZE = 4096
+
+
+class CachedKey(NamedTuple):
+    fingerprint: str
+    key: object  # объект ключа (inprocess) или путь к PEM (openssl)
+    serial: int  # серийный номер сертификата — для проверки отзыва
+
+
+class PublicKeyCache:
+    def __init__(self, loader, maxsize: int = DEFAULT_MAXSIZE, persist_dir: Path = None):
+        # loader(cert_path, cert_bytes, pem_path) -> (ключ, serial); pem_path —
+        # файл, в котором ключ сохраняется между запусками (или None)
+        self.loader = loader
+        self.maxsize = maxsize
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self._by_stat = OrderedDict()
+        self._by_fingerprint = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cert_path) -> CachedKey:
+        cert_path = Path(cert_path)
+        st = os.stat(cert_path)
+        stat_key = (str(cert_path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._by_stat.get(stat_key)
+            if entry is not None:
+                self._by_stat.move_to_end(stat_key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        data = cert_path.read_bytes()
+        fingerprint = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._by_fingerprint.get(fingerprint)
+        if entry is None:
+            pem_path = None
+            if self.persist_dir:
+                self.persist_dir.mkdir(parents=True, exist_ok=True)
+                pem_path = self.persist_dir / f"{fingerprint}.pub.pem"
+            entry = CachedKey(fingerprint, *self.loader(cert_path, data, pem_path))
+            with self._lock:
+                self._remember(self._by_fingerprint, fingerprint, entry)
+        with self._lock:
+            self._remember(self._by_stat, stat_key, entry)
+        return entry
+
+    def _remember(self, table, key, entry):
+        table[key] = entry
+        table.move_to_end(key)
+        while len(table) > self.maxsize:
+            table.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._by_stat.clear()
+            self._by_fingerprint.clear()
@@ -0,0 +1,54 @@
+"""
+Типы ключей CA и пользователей: RSA любого размера, ECDSA P-256, Ed25519.
+
+Имена: rsa2048, rsa3072, rsa4096 (вообще rsa<бит>), p256, ed25519.
+Подпись файла — всегда hash-then-sign по SHA-256 (файл хэшируется потоково):
+RSA — PKCS#1 v1.5, ECDSA — DER (r, s), как у `openssl dgst -sha256 -sign`;
+Ed25519 подписывает 32-байтный SHA-256 файла (`openssl pkeyutl -rawin`),
+потому что Ed25519 не принимает готовый хэш сообщения.
+"""
+
+import base64
+
+KEY_TYPES = ("rsa2048", "rsa3072", "rsa4096", "p256", "ed25519")
+DEFAULT_CA_KEY_TYPE = "rsa4096"
+DEFAULT_USER_KEY_TYPE = "rsa2048"
+
+# OID алгоритма в начале DER ключа (PKCS#8 / SubjectPublicKeyInfo)
+_OIDS = {
+    "rsa": bytes.fromhex("06092a864886f70d010101"),
+    "ec": bytes.fromhex("06072a8648ce3d0201"),
+    "ed25519": bytes.fromhex("06032b6570"),
+}
+
+
+def parse_key_type(name: str):
+    """'rsa3072' -> ('rsa', 3072), 'p256' -> ('ec', 256), 'ed25519' -> ('ed25519', 256)"""
+    name = name.lower()
+    if name.startswith("rsa") and name[3:].isdigit() and int(name[3:]) >= 1024:
+        return "rsa", int(name[3:])
+    if name in ("p256", "ecdsa", "ec"):
+        return "ec", 256
+    if name == "ed25519":
+        return "ed25519", 256
+    raise ValueError(f"Неизвестный тип ключа: {name} (допустимо: {', '.join(KEY_TYPES)})")
+
+
+def pem_algorithm(pem: bytes) -> str:
+    """Алгоритм ключа в PEM: rsa, ec или ed25519 (PKCS#1 'RSA ... KEY' — rsa)"""
+    lines = pem.decode("ascii").strip().splitlines()
+    der = base64.b64decode("".join(line for line in lines if not line.startswith("-----")))
+    head = der[:32]
+    for algorithm, oid in _OIDS.items():
+        if oid in head:
+            return algorithm
+    return "rsa"
+
+
+def openssl_genkey_args(key_type: str) -> list:
+    algorithm, bits = parse_key_type(key_type)
+    if algorithm == "rsa":
+        return ["genpkey", "-algorithm", "RSA", "-pkeyopt", f"rsa_keygen_bits:{bits}"]
+    if algorithm == "ec":
+        return ["genpkey", "-algorithm", "EC", "-pkeyopt", "ec_paramgen_curve:P-256"]
+    return ["genpkey", "-algorithm", "ED25519"]
@@ -1,20 +1,62 @@
 """
 Команды:
   init                         — инициализировать CA (создаст ./pki)
-  create-user <name>           — создать ключ и сертификат пользователя (2048 бит, 365 дней)
-  sign-file <user> <file>      — подписать файл приватным ключом пользователя (RSA + SHA256)
+  create-user <name>           — создать ключ и сертификат пользователя (365 дней)
+  sign-file <user> <file>...   — подписать файлы приватным ключом пользователя (SHA-256 и тип его
+                                 ключа: RSA, ECDSA P-256 или Ed25519), подписи в <file>.sig;
+                                 файлы хэшируются потоково
   verify <user> <file> <sig>   — проверить подпись (использует сертификат пользователя)
-  revoke <user>                — отозвать сертификат пользователя (через CRL)
-  gen-crl                      — сгенерировать/обновить CRL (crl.pem)
-  show-certs                   — показать выданные сертификаты (в папке pki/certs)
+  revoke <user>                — отозвать сертификат пользователя (отметка в index.txt и новый CRL)
+  gen-crl                      — сгенерировать/обновить CRL (crl.pem) по базе index.txt
+  show-certs                   — показать выданные сертификаты (индекс SQLite: --subject, --status,
+                                 --expires-within DAYS, --sort, --desc, --limit, --rebuild)
+  create-users <file>          — массово создать пользователей из списка/CSV (--workers N)
+  verify-batch <manifest>      — проверить подписи из манифеста (CSV/JSON lines: user,file,sig);
+                                 результаты в JSON lines (--output, --workers N, --processes)
+  serve                        — процесс с API на локальном сокете (--socket PATH или --port N):
+                                 ключ CA и кэши остаются в памяти; клиент — client.py;
+                                 файлы — только внутри --files-dir (по умолчанию текущая папка)
+
+Опция --key-type (init, create-user, create-users): rsa2048, rsa3072, rsa4096, p256, ed25519;
+  по умолчанию CA — rsa4096, пользователи — rsa2048. Сравнение скорости: python inprocess.py
+
+Опция --backend (или переменная окружения PKI_BACKEND):
+  inprocess — всё внутри процесса через библиотеку cryptography (по умолчанию, если установлена)
+  openssl   — через вызовы openssl (для сравнения результатов)
 """
 
 import argparse
+import csv
+import datetime
+import os
+import re
 import subprocess
 import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 import sys
 
+try:
+    import fcntl
+except ImportError:  # Windows: без блокировки файла серийных номеров
+    fcntl = None
+
+import batch
+import digest
+from inventory import CertInventory, CertRecord, SORT_COLUMNS
+from keycache import PublicKeyCache
+import keytypes
+import revocation
+
+try:
+    import inprocess
+except ImportError:  # библиотека cryptography не установлена
+    inprocess = None
+
 ROOT = Path.cwd() / "pki"
 CA_DIR = ROOT / "ca"
 CERTS_DIR = CA_DIR / "certs"
@@ -25,16 +67,39 @@ CRL_PEM = CRL_DIR / "crl.pem"
 CA_KEY = PRIVATE_DIR / "ca.key.pem"
 CA_CERT = CA_DIR / "ca.cert.pem"
 CA_SERIAL = CA_DIR / "ca.srl"
+CA_LOCK = CA_DIR / "ca.lock"  # блокировка ca.srl и index.txt
+CA_INDEX = CA_DIR / "index.txt"  # база выданных сертификатов (формат openssl ca)
+CA_CRLNUMBER = CA_DIR / "crlnumber"
+OPENSSL_CA_CONF = CA_DIR / "openssl-ca.cnf"  # минимальный конфиг для openssl ca -gencrl
+CRL_DAYS = 30
+INVENTORY_DB = CA_DIR / "inventory.sqlite3"  # индекс сертификатов для show-certs
+SERVE_SOCKET = CA_DIR / "pki.sock"  # сокет режима serve (см. server.py, client.py)
+SERVE_TOKEN = CA_DIR / "serve.token"  # секрет клиентов serve --port (только для владельца)
+PUBKEY_DIR = CA_DIR / "pubkeys"  # открытые ключи из сертификатов для openssl dgst -verify
 
 OPENSSL_BIN = shutil.which("openssl")
-if not OPENSSL_BIN:
-    print("Ошибка: openssl не найден в PATH.")
-    sys.exit(1)
+BACKENDS = ("inprocess", "openssl")
+BACKEND = os.environ.get("PKI_BACKEND") or ("inprocess" if inprocess else "openssl")
 
+CA_SUBJECT_CN = "My Test Root CA"
 
-def run(cmd, **kwargs):
-    print("=>", " ".join(cmd))
-    subprocess.run(cmd, check=True, **kwargs)
+
+def set_backend(name: str):
+    global BACKEND
+    if name not in BACKENDS:
+        raise SystemExit(f"Неизвестный бэкенд: {name}")
+    if name == "inprocess" and inprocess is None:
+        raise SystemExit("Бэкенд inprocess требует библиотеку cryptography (pip install cryptography).")
+    if name == "openssl" and not OPENSSL_BIN:
+        print("Ошибка: openssl не найден в PATH.")
+        sys.exit(1)
+    BACKEND = name
+
+
+def run(cmd, echo=True, **kwargs):
+    if echo:
+        print("=>", " ".join(cmd))
+    return subprocess.run(cmd, check=True, **kwargs)
 
 
 def ensure_dirs():
@@ -42,15 +107,51 @@ def ensure_dirs():
         d.mkdir(parents=True, exist_ok=True)
 
 
-def init_ca():
+_ca_thread_lock = threading.Lock()
+
+
+@contextmanager
+def ca_lock():
+    # Исключительный доступ к ca.srl и index.txt: между процессами — flock,
+    # между потоками одного процесса — обычная блокировка
+    with _ca_thread_lock, open(CA_LOCK, "w") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def allocate_serials(count: int) -> list:
+    # Следующие count серийных номеров из ca.srl (hex, как у openssl -CAserial).
+    # Новое значение записывается атомарно (os.replace) под ca_lock, поэтому
+    # параллельные процессы не получат один номер.
+    with ca_lock():
+        last = int(CA_SERIAL.read_text().strip(), 16) if CA_SERIAL.exists() else 0x1000
+        tmp = CA_SERIAL.with_suffix(".srl.tmp")
+        tmp.write_text(f"{last + count:X}\n")
+        os.replace(tmp, CA_SERIAL)
+    return list(range(last + 1, last + count + 1))
+
+
+def allocate_serial() -> int:
+    return allocate_serials(1)[0]
+
+
+def init_ca(key_type: str = keytypes.DEFAULT_CA_KEY_TYPE):
     ensure_dirs()
-    # Генерация ключа CA (4096 бит)
+    # Генерация ключа CA (по умолчанию RSA 4096 бит)
     if not CA_KEY.exists():
-        run([OPENSSL_BIN, "genrsa", "-out", str(CA_KEY), "4096"])
-        CA_KEY.chmod(0o600)
+        if BACKEND == "inprocess":
+            inprocess.generate_key(CA_KEY, key_type)
+        else:
+            run([OPENSSL_BIN, *keytypes.openssl_genkey_args(key_type), "-out", str(CA_KEY)])
+            CA_KEY.chmod(0o600)
     # Self-signed сертификат CA (3650 дней)
-    if not CA_CERT.exists():
-        subj = "/CN=My Test Root CA"
+    if not CA_CERT.exists() and BACKEND == "inprocess":
+        inprocess.create_self_signed_ca(
+            inprocess.load_private_key(CA_KEY), CA_CERT, CA_SUBJECT_CN, 3650
+        )
+    elif not CA_CERT.exists():
+        subj = f"/CN={CA_SUBJECT_CN}"
         run(
             [
                 OPENSSL_BIN,
@@ -72,20 +173,69 @@ def init_ca():
     # Создание CA сериал файла
     if not CA_SERIAL.exists():
         CA_SERIAL.write_text("1000\n")
+    # База выданных сертификатов и номер CRL
+    CA_INDEX.touch()
+    if not CA_CRLNUMBER.exists():
+        CA_CRLNUMBER.write_text("1000\n")
     print("CA инициализирован в папке:", CA_DIR)
 
 
-def create_user(username: str):
+# Имя пользователя становится частью имён файлов в ./pki: без '/' и '..';
+# "ca" занято ключом CA (private/ca.key.pem)
+USERNAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,63}")
+
+
+def check_username(username: str):
+    if not USERNAME_RE.fullmatch(username) or username.lower() == "ca":
+        raise SystemExit(f"Недопустимое имя пользователя: {username!r}")
+
+
+def user_paths(username: str):
+    check_username(username)
+    return (
+        PRIVATE_DIR / f"{username}.key.pem",
+        CSRS_DIR / f"{username}.csr.pem",
+        CERTS_DIR / f"{username}.cert.pem",
+    )
+
+
+def require_ca():
+    if not CA_CERT.exists() or not CA_KEY.exists():
+        raise SystemExit("CA не инициализирована. Сначала выполните init.")
+
+
+def load_ca():
+    # (сертификат, ключ) CA для бэкенда inprocess
+    return inprocess.load_certificate(CA_CERT), inprocess.load_private_key(CA_KEY)
+
+
+def create_user(username: str, ca=None, key_type: str = keytypes.DEFAULT_USER_KEY_TYPE):
+    # ca — уже загруженные (сертификат, ключ) CA, например в режиме serve
+    keytypes.parse_key_type(key_type)
     ensure_dirs()
-    user_key = PRIVATE_DIR / f"{username}.key.pem"
-    user_csr = CSRS_DIR / f"{username}.csr.pem"
-    user_cert = CERTS_DIR / f"{username}.cert.pem"
+    user_key, user_csr, user_cert = user_paths(username)
 
     if user_key.exists():
         raise SystemExit(f"Ключ пользователя {username} уже существует: {user_key}")
+    require_ca()
+
+    if BACKEND == "inprocess":
+        key = inprocess.generate_key(user_key, key_type)
+        csr = inprocess.create_csr(key, username, user_csr)
+        ca_cert, ca_key = ca or load_ca()
+        inprocess.issue_certificate(csr, ca_cert, ca_key, allocate_serial(), 365, user_cert)
+    else:
+        create_user_openssl(username, allocate_serial(), key_type)
+    record_issued(username, user_cert)
+    print(f"Создан сертификат: {user_cert}")
+    return user_key, user_cert
+
+
+def create_user_openssl(username: str, serial: int, key_type: str = keytypes.DEFAULT_USER_KEY_TYPE):
+    user_key, user_csr, user_cert = user_paths(username)
 
     # Генерация ключа пользователя
-    run([OPENSSL_BIN, "genrsa", "-out", str(user_key), "2048"])
+    run([OPENSSL_BIN, *keytypes.openssl_genkey_args(key_type), "-out", str(user_key)])
     user_key.chmod(0o600)
 
     # CSR
@@ -116,7 +266,8 @@ def create_user(username: str):
             str(CA_CERT),
             "-CAkey",
             str(CA_KEY),
-            "-CAcreateserial",
+            "-set_serial",
+            str(serial),
             "-out",
             str(user_cert),
             "-days",
@@ -124,16 +275,168 @@ def create_user(username: str):
             "-sha256",
         ]
     )
-    print(f"Создан сертификат: {user_cert}")
-    return user_key, user_cert
+
+
+def cert_record(cert_path: Path) -> CertRecord:
+    if BACKEND == "inprocess":
+        return inprocess.certificate_record(Path(cert_path).read_bytes())
+    out = run(
+        [
+            OPENSSL_BIN,
+            "x509",
+            "-in",
+            str(cert_path),
+            "-noout",
+            "-serial",
+            "-subject",
+            "-startdate",
+            "-enddate",
+            "-fingerprint",
+            "-sha256",
+            "-nameopt",
+            "compat",
+        ],
+        echo=False,
+        capture_output=True,
+        text=True,
+    ).stdout
+    fields = {}
+    for line in out.splitlines():
+        name, _, value = line.partition("=")
+        fields[name.strip()] = value.strip()
+
+    def when(text):
+        parsed = datetime.datetime.strptime(text, "%b %d %H:%M:%S %Y %Z")
+        return parsed.replace(tzinfo=datetime.timezone.utc)
+
+    return CertRecord(
+        int(fields["serial"], 16),
+        fields["subject"],
+        when(fields["notBefore"]),
+        when(fields["notAfter"]),
+        fields["sha256 Fingerprint"].replace(":", "").lower(),
+    )
+
+
+def record_issued(username: str, cert_path: Path):
+    # Новый сертификат — в базу CA (index.txt) и в индекс show-certs
+    record = cert_record(cert_path)
+    entry = revocation.IndexEntry("V", record.not_after, None, record.serial, f"/CN={username}")
+    with ca_lock():
+        revocation.append_index(CA_INDEX, [entry])
+    with CertInventory(INVENTORY_DB) as inv:
+        inv.add(record, cert_path)
+
+
+def read_usernames(path: str) -> list:
+    # Одно имя в строке или CSV (первый столбец, заголовок username/name пропускается)
+    names = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].startswith("#"):
+                continue
+            names.append(row[0].strip())
+    if names and names[0].lower() in ("username", "name", "user"):
+        names.pop(0)
+    return names
+
+
+def _timed_openssl_user(username: str, serial: int, key_type: str):
+    start = time.perf_counter()
+    create_user_openssl(username, serial, key_type)
+    record_issued(username, user_paths(username)[2])
+    return time.perf_counter() - start
+
+
+def create_users(listfile: str, workers: int = None, key_type: str = keytypes.DEFAULT_USER_KEY_TYPE):
+    keytypes.parse_key_type(key_type)
+    ensure_dirs()
+    require_ca()
+    names = []
+    for name in dict.fromkeys(read_usernames(listfile)):
+        if user_paths(name)[0].exists():
+            print(f"Пропуск {name}: ключ уже существует")
+        else:
+            names.append(name)
+    if not names:
+        print("Нет новых пользователей.")
+        return
+
+    # Все серийные номера выделяются заранее одним блоком
+    serials = dict(zip(names, allocate_serials(len(names))))
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    done = 0
+
+    if BACKEND == "inprocess":
+        # Генерация ключей (особенно RSA) нагружает CPU — в пуле процессов;
+        # CSR и подпись CA (быстрые операции) — в основном процессе с
+        # однажды загруженным ключом CA.
+        ca_cert, ca_key = load_ca()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(inprocess.generate_key_pem, key_type): n for n in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                pem, keygen_time = future.result()
+                t = time.perf_counter()
+                user_key, user_csr, user_cert = user_paths(name)
+                key = inprocess.save_private_key_pem(user_key, pem)
+                csr = inprocess.create_csr(key, name, user_csr)
+                inprocess.issue_certificate(csr, ca_cert, ca_key, serials[name], 365, user_cert)
+                record_issued(name, user_cert)
+                done += 1
+                print(
+                    f"{name}: ключ {keygen_time:.3f} с, сертификат "
+                    f"{time.perf_counter() - t:.3f} с (serial {serials[name]:X})"
+                )
+    else:
+        # openssl работает в отдельных процессах, поэтому достаточно потоков
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_timed_openssl_user, n, serials[n], key_type): n for n in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                elapsed = future.result()
+                done += 1
+                print(f"{name}: {elapsed:.3f} с (serial {serials[name]:X})")
+
+    elapsed = time.perf_counter() - start
+    print(f"Создано пользователей: {done} за {elapsed:.2f} с ({done / elapsed:.1f} в секунду)")
 
 
 def sign_file(username: str, filepath: str):
-    user_key = PRIVATE_DIR / f"{username}.key.pem"
-    if not user_key.exists():
-        raise SystemExit("Ключ пользователя не найден: " + str(user_key))
-    filepath = Path(filepath)
-    sig = filepath.with_suffix(filepath.suffix + ".sig")
+    return sign_files(username, [filepath])[0]
+
+
+@contextmanager
+def _digest_tempfile(filepath: Path):
+    # SHA-256 файла во временном файле — вход `openssl pkeyutl -rawin` для Ed25519
+    fd, name = tempfile.mkstemp(suffix=".sha256")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(digest.sha256_file(filepath))
+        yield name
+    finally:
+        os.unlink(name)
+
+
+def _sign_openssl(user_key: Path, filepath: Path, sig: Path):
+    if keytypes.pem_algorithm(user_key.read_bytes()) == "ed25519":
+        with _digest_tempfile(filepath) as digest_path:
+            run(
+                [
+                    OPENSSL_BIN,
+                    "pkeyutl",
+                    "-sign",
+                    "-rawin",
+                    "-inkey",
+                    str(user_key),
+                    "-in",
+                    digest_path,
+                    "-out",
+                    str(sig),
+                ]
+            )
+        return
     run(
         [
             OPENSSL_BIN,
@@ -146,69 +449,316 @@ def sign_file(username: str, filepath: str):
             str(filepath),
         ]
     )
-    print("Подписанный файл:", sig)
-    return sig
 
 
-def verify_sig(username: str, filepath: str, sigpath: str):
-    user_cert = CERTS_DIR / f"{username}.cert.pem"
-    if not user_cert.exists():
-        raise SystemExit("Сертификат пользователя не найден: " + str(user_cert))
-    pubkey = PRIVATE_DIR / f"{username}.pub.pem"
-    run(
-        [
-            OPENSSL_BIN,
-            "x509",
-            "-in",
-            str(user_cert),
-            "-pubkey",
-            "-noout",
-            "-out",
-            str(pubkey),
-        ]
-    )
-    try:
-        run(
-            [
+def check_readable(*paths):
+    # OSError для отсутствующего или нечитаемого файла — одинаково для обоих
+    # бэкендов (openssl иначе сообщает о нём как об ошибке команды или
+    # неверной подписи)
+    for path in paths:
+        with open(path, "rb"):
+            pass
+
+
+def sign_files(username: str, filepaths, workers: int = None) -> list:
+    # Отсоединённые подписи <file>.sig для нескольких файлов одним вызовом.
+    # inprocess: ключ загружается один раз, файлы хэшируются потоково в пуле
+    # потоков, а подпись готовых хэшей идёт в основном потоке — чтение и
+    # хэширование следующих файлов перекрываются с подписью предыдущих.
+    user_key = PRIVATE_DIR / f"{username}.key.pem"
+    if not user_key.exists():
+        raise SystemExit("Ключ пользователя не найден: " + str(user_key))
+    filepaths = [Path(f) for f in filepaths]
+    check_readable(*filepaths)
+    sigs = [f.with_suffix(f.suffix + ".sig") for f in filepaths]
+    workers = workers or os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if BACKEND == "inprocess":
+            key = inprocess.load_private_key(user_key)
+            for sig, file_digest in zip(sigs, pool.map(digest.sha256_file, filepaths)):
+                sig.write_bytes(inprocess.sign_digest(key, file_digest))
+                print("Подписанный файл:", sig)
+        else:
+            # openssl dgst сам читает файл потоково; процессы openssl — параллельно
+            for sig, _ in zip(sigs, pool.map(_sign_openssl, [user_key] * len(sigs), filepaths, sigs)):
+                print("Подписанный файл:", sig)
+    return sigs
+
+
+def _load_pubkey_inprocess(cert_path: Path, cert_bytes: bytes, pem_path: Path):
+    # Сертификат разбирается один раз: ключ и serial; PEM на диске не нужен
+    return inprocess.certificate_public_key(cert_bytes)
+
+
+def _load_pubkey_openssl(cert_path: Path, cert_bytes: bytes, pem_path: Path):
+    # openssl dgst -verify нужен файл с ключом — он сохраняется в PUBKEY_DIR;
+    # серийный номер и ключ извлекаются одним вызовом openssl
+    out = run(
+        [OPENSSL_BIN, "x509", "-in", str(cert_path), "-noout", "-serial", "-pubkey"],
+        echo=False,
+        capture_output=True,
+        text=True,
+    ).stdout
+    serial_line, _, pubkey = out.partition("\n")
+    serial = int(serial_line.split("=", 1)[1], 16)
+    if not pem_path.exists():
+        tmp = pem_path.with_name(f"{pem_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(pubkey)
+        os.replace(tmp, pem_path)
+    return pem_path, serial
+
+
+_pubkey_caches = {}
+
+
+def pubkey_cache() -> PublicKeyCache:
+    # Отдельный кэш для каждого бэкенда: объекты ключей (inprocess) или пути
+    # к PEM в PUBKEY_DIR (openssl — ему нужен файл ключа)
+    if BACKEND not in _pubkey_caches:
+        if BACKEND == "inprocess":
+            _pubkey_caches[BACKEND] = PublicKeyCache(_load_pubkey_inprocess)
+        else:
+            _pubkey_caches[BACKEND] = PublicKeyCache(_load_pubkey_openssl, persist_dir=PUBKEY_DIR)
+    return _pubkey_caches[BACKEND]
+
+
+def _crl_serials_inprocess(crl_bytes: bytes) -> set:
+    ca_public_key = inprocess.load_certificate(CA_CERT).public_key()
+    return inprocess.crl_serials(crl_bytes, ca_public_key)
+
+
+def _crl_serials_openssl(crl_bytes: bytes) -> set:
+    # -CAfile: openssl проверяет подпись CRL (иначе ненулевой код возврата)
+    out = run(
+        [OPENSSL_BIN, "crl", "-CAfile", str(CA_CERT), "-noout", "-text"],
+        echo=False,
+        input=crl_bytes,
+        capture_output=True,
+    ).stdout.decode()
+    return {
+        int(line.split(":", 1)[1], 16)
+        for line in out.splitlines()
+        if line.strip().startswith("Serial Number:")
+    }
+
+
+_revocation_sets = {}
+
+
+def revocation_set() -> revocation.RevocationSet:
+    if BACKEND not in _revocation_sets:
+        loader = _crl_serials_inprocess if BACKEND == "inprocess" else _crl_serials_openssl
+        _revocation_sets[BACKEND] = revocation.RevocationSet(CRL_PEM, loader)
+    return _revocation_sets[BACKEND]
+
+
+def _verify_openssl(pem_path: Path, filepath, sigpath, echo: bool = True) -> bool:
+    # RSA и ECDSA — openssl dgst -verify, Ed25519 — pkeyutl по SHA-256 файла
+    if keytypes.pem_algorithm(Path(pem_path).read_bytes()) == "ed25519":
+        with _digest_tempfile(filepath) as digest_path:
+            cmd = [
                 OPENSSL_BIN,
-                "dgst",
-                "-sha256",
+                "pkeyutl",
                 "-verify",
-                str(pubkey),
-                "-signature",
+                "-pubin",
+                "-inkey",
+                str(pem_path),
+                "-rawin",
+                "-in",
+                digest_path,
+                "-sigfile",
                 str(sigpath),
-                str(filepath),
             ]
-        )
+            return _openssl_ok(cmd, echo)
+    cmd = [
+        OPENSSL_BIN,
+        "dgst",
+        "-sha256",
+        "-verify",
+        str(pem_path),
+        "-signature",
+        str(sigpath),
+        str(filepath),
+    ]
+    return _openssl_ok(cmd, echo)
+
+
+def _openssl_ok(cmd, echo: bool) -> bool:
+    if echo:
+        print("=>", " ".join(cmd))
+    return subprocess.run(cmd, capture_output=True).returncode == 0
+
+
+def verify_sig(username: str, filepath: str, sigpath: str):
+    user_cert = CERTS_DIR / f"{username}.cert.pem"
+    if not user_cert.exists():
+        raise SystemExit("Сертификат пользователя не найден: " + str(user_cert))
+    check_readable(filepath, sigpath)
+    entry = pubkey_cache().get(user_cert)
+    if revocation_set().is_revoked(entry.serial):
+        raise SystemExit(f"Сертификат пользователя отозван (serial {entry.serial:X}).")
+    public_key = entry.key
+    if BACKEND == "inprocess":
+        if not inprocess.verify_file(public_key, filepath, sigpath):
+            raise SystemExit("Подпись неверна.")
         print("Подпись верна.")
-    finally:
-        if pubkey.exists():
-            pubkey.unlink()
+        return
+    if not _verify_openssl(public_key, filepath, sigpath):
+        raise SystemExit("Подпись неверна.")
+    print("Подпись верна.")
+
+
+def verify_triple(username: str, filepath: str, sigpath: str) -> dict:
+    # Одна запись пакетной проверки; ошибки не прерывают пакет, а попадают в результат
+    result = {"user": username, "file": filepath, "sig": sigpath, "valid": False}
+    try:
+        check_readable(filepath, sigpath)
+        entry = pubkey_cache().get(CERTS_DIR / f"{username}.cert.pem")
+        if revocation_set().is_revoked(entry.serial):
+            result["error"] = f"сертификат отозван (serial {entry.serial:X})"
+            return result
+        public_key = entry.key
+        if BACKEND == "inprocess":
+            result["valid"] = inprocess.verify_digest(
+                public_key, digest.sha256_file(filepath), Path(sigpath).read_bytes()
+            )
+        else:
+            result["valid"] = _verify_openssl(public_key, filepath, sigpath, echo=False)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        result["error"] = str(e)
+    return result
+
+
+def verify_many(triples, workers: int = None, processes: bool = False):
+    """Проверить подписи (user, file, sig); результаты в порядке входа
+
+    Процессы имеют смысл только для бэкенда inprocess (у каждого свой кэш
+    ключей); openssl и так работает в отдельных процессах, ему хватает потоков.
+    """
+    processes = processes and BACKEND == "inprocess"
+    return batch.verify_batch(
+        triples, verify_triple, workers, processes, initializer=set_backend, initargs=(BACKEND,)
+    )
+
+
+def verify_batch(manifest: str, output: str = None, workers: int = None, processes: bool = False):
+    require_ca()
+    start = time.perf_counter()
+    results = verify_many(batch.read_manifest(manifest), workers, processes)
+    if output:
+        with open(output, "w", encoding="utf-8") as out:
+            total, valid = batch.write_results(results, out)
+    else:
+        total, valid = batch.write_results(results, sys.stdout)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Проверено подписей: {total}, верных: {valid}, неверных: {total - valid} "
+        f"за {elapsed:.2f} с ({total / max(elapsed, 1e-9):.0f} в секунду)",
+        file=sys.stderr,
+    )
+    return total, valid
 
 
 def revoke_user(username: str):
     cert = CERTS_DIR / f"{username}.cert.pem"
     if not cert.exists():
         raise SystemExit("Сертификат пользователя не найден: " + str(cert))
-    # Простая эмуляция отзыва: добавим запись в CRL через openssl ca только если CRL создан
-    print(
-        "Отзыв через CRL поддерживается только при использовании openssl ca (не используется напрямую x509)."
+    require_ca()
+    record = cert_record(cert)
+    serial = record.serial
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with ca_lock():
+        entries = revocation.read_index(CA_INDEX)
+        if serial not in {e.serial for e in entries}:
+            # сертификат выдан до появления index.txt
+            entries.append(revocation.IndexEntry("V", record.not_after, None, serial, f"/CN={username}"))
+        revocation.write_index(CA_INDEX, revocation.mark_revoked(entries, serial, now))
+    with CertInventory(INVENTORY_DB) as inv:
+        inv.add(record, cert)
+        inv.mark_revoked([(serial, now)])
+    print(f"Сертификат {username} (serial {serial:X}) отозван.")
+    gen_crl()
+
+
+def next_crl_number() -> int:
+    with ca_lock():
+        number = int(CA_CRLNUMBER.read_text().strip(), 16) if CA_CRLNUMBER.exists() else 0x1000
+        CA_CRLNUMBER.write_text(f"{number + 1:X}\n")
+    return number
+
+
+def write_openssl_ca_config():
+    OPENSSL_CA_CONF.write_text(
+        "[ ca ]\n"
+        "default_ca = CA_default\n"
+        "\n"
+        "[ CA_default ]\n"
+        f"database = {CA_INDEX.as_posix()}\n"
+        f"crlnumber = {CA_CRLNUMBER.as_posix()}\n"
+        f"certificate = {CA_CERT.as_posix()}\n"
+        f"private_key = {CA_KEY.as_posix()}\n"
+        "default_md = sha256\n"
+        f"default_crl_days = {CRL_DAYS}\n"
     )
 
 
 def gen_crl():
     CRL_DIR.mkdir(exist_ok=True)
-    if not CA_CERT.exists() or not CA_KEY.exists():
-        raise SystemExit("CA не инициализирована. Сначала выполните init.")
-    run(
-        [OPENSSL_BIN, "ca", "-gencrl", "-out", str(CRL_PEM), "-config", "/dev/null"]
-    )  # заглушка
+    require_ca()
+    CA_INDEX.touch()
+    if BACKEND == "inprocess":
+        with ca_lock():
+            revoked = [(e.serial, e.revoked_at) for e in revocation.read_index(CA_INDEX) if e.status == "R"]
+        inprocess.generate_crl(
+            inprocess.load_certificate(CA_CERT),
+            inprocess.load_private_key(CA_KEY),
+            revoked,
+            next_crl_number(),
+            CRL_DAYS,
+            CRL_PEM,
+        )
+    else:
+        if not CA_CRLNUMBER.exists():
+            CA_CRLNUMBER.write_text("1000\n")
+        write_openssl_ca_config()
+        with ca_lock():
+            run([OPENSSL_BIN, "ca", "-gencrl", "-config", str(OPENSSL_CA_CONF), "-out", str(CRL_PEM)])
     print("CRL создан:", CRL_PEM)
 
 
-def show_certs():
-    for c in sorted(CERTS_DIR.glob("*.pem")):
-        print(c)
+def rebuild_inventory(inv: CertInventory):
+    with ca_lock():
+        revoked = [(e.serial, e.revoked_at) for e in revocation.read_index(CA_INDEX) if e.status == "R"]
+    start = time.perf_counter()
+    parsed, removed = inv.rebuild(CERTS_DIR, cert_record, revoked)
+    print(
+        f"Индекс обновлён: разобрано {parsed}, удалено {removed}, всего {inv.count()} "
+        f"за {time.perf_counter() - start:.2f} с",
+        file=sys.stderr,
+    )
+
+
+def show_certs(
+    subject: str = None,
+    status: str = None,
+    expires_within: float = None,
+    sort: str = "not_after",
+    desc: bool = False,
+    limit: int = None,
+    rebuild: bool = False,
+):
+    # Запрос к индексу SQLite; при первом запуске (или --rebuild) индекс
+    # заполняется сканированием папки сертификатов
+    ensure_dirs()
+    with CertInventory(INVENTORY_DB) as inv:
+        if rebuild or not inv.count():
+            rebuild_inventory(inv)
+        for serial, subj, _, not_after, _, revoked, path in inv.query(
+            subject, status, expires_within, sort, desc, limit
+        ):
+            state = "revoked" if revoked else "valid"
+            print(f"{serial:X}\t{subj}\t{not_after}\t{state}\t{path or ''}")
 
 
 def parse_args():
@@ -223,27 +773,58 @@ def parse_args():
             "revoke",
             "gen-crl",
             "show-certs",
+            "create-users",
+            "verify-batch",
+            "serve",
         ],
     )
     p.add_argument("args", nargs="*")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--output", help="файл результатов verify-batch (по умолчанию stdout)")
+    p.add_argument(
+        "--processes", action="store_true", help="verify-batch: пул процессов вместо потоков"
+    )
+    # Фильтры и сортировка show-certs
+    p.add_argument("--subject", help="show-certs: шаблон имени (LIKE, например 'al%%')")
+    p.add_argument("--status", choices=["valid", "revoked", "expired"])
+    p.add_argument("--expires-within", type=float, metavar="DAYS")
+    p.add_argument("--sort", choices=SORT_COLUMNS, default="not_after")
+    p.add_argument("--desc", action="store_true")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--rebuild", action="store_true", help="show-certs: пересканировать папку сертификатов")
+    p.add_argument(
+        "--key-type",
+        help=f"тип ключа: {', '.join(keytypes.KEY_TYPES)} "
+        f"(по умолчанию CA — {keytypes.DEFAULT_CA_KEY_TYPE}, пользователи — {keytypes.DEFAULT_USER_KEY_TYPE})",
+    )
+    p.add_argument("--socket", default=str(SERVE_SOCKET), help="serve: Unix-сокет")
+    p.add_argument("--port", type=int, help="serve: TCP-порт на 127.0.0.1 вместо сокета")
+    p.add_argument("--files-dir", help="serve: папка, в которой разрешены файлы и подписи")
+    p.add_argument("--backend", choices=BACKENDS, default=BACKEND)
     return p.parse_args()
 
 
 def main():
     args = parse_args()
+    set_backend(args.backend)
+    if args.key_type:
+        try:
+            keytypes.parse_key_type(args.key_type)
+        except ValueError as e:
+            raise SystemExit(str(e))
     cmd = args.cmd
     a = args.args
     try:
         if cmd == "init":
-            init_ca()
+            init_ca(args.key_type or keytypes.DEFAULT_CA_KEY_TYPE)
         elif cmd == "create-user":
             if len(a) != 1:
                 raise SystemExit("Usage: create-user <username>")
-            create_user(a[0])
+            create_user(a[0], key_type=args.key_type or keytypes.DEFAULT_USER_KEY_TYPE)
         elif cmd == "sign-file":
-            if len(a) != 2:
-                raise SystemExit("Usage: sign-file <username> <file>")
-            sign_file(a[0], a[1])
+            if len(a) < 2:
+                raise SystemExit("Usage: sign-file <username> <file> [<file> ...]")
+            sign_files(a[0], a[1:], args.workers)
         elif cmd == "verify":
             if len(a) != 3:
                 raise SystemExit("Usage: verify <username> <file> <sig>")
@@ -255,10 +836,37 @@ def main():
         elif cmd == "gen-crl":
             gen_crl()
         elif cmd == "show-certs":
-            show_certs()
+            show_certs(
+                args.subject,
+                args.status,
+                args.expires_within,
+                args.sort,
+                args.desc,
+                args.limit,
+                args.rebuild,
+            )
+        elif cmd == "create-users":
+            if len(a) != 1:
+                raise SystemExit("Usage: create-users <file> [--workers N]")
+            create_users(a[0], args.workers, args.key_type or keytypes.DEFAULT_USER_KEY_TYPE)
+        elif cmd == "verify-batch":
+            if len(a) != 1:
+                raise SystemExit("Usage: verify-batch <manifest> [--output file] [--workers N]")
+            total, valid = verify_batch(a[0], args.output, args.workers, args.processes)
+            if valid != total:
+                sys.exit(2)
+        elif cmd == "serve":
+            if BACKEND != "inprocess":
+                raise SystemExit("Режим serve требует бэкенд inprocess (библиотека cryptography).")
+            import server  # asyncio нужен только этой команде
+
+            server.serve(sys.modules[__name__], Path(args.socket), args.port, args.workers, args.files_dir)
     except subprocess.CalledProcessError as e:
         print("Команда OpenSSL завершилась с ошибкой:", e)
         sys.exit(1)
+    except (OSError, ValueError) as e:
+        # Ошибки бэкенда inprocess (файлы, разбор ключей и подписей) — без трассировки
+        raise SystemExit(f"Ошибка: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+База выданных сертификатов CA и проверка отзыва.
+
+index.txt ведётся в формате базы `openssl ca` (поля через табуляцию):
+  статус (V/R)  notAfter  дата отзыва  serial (hex)  файл  subject
+поэтому `openssl ca -gencrl` строит CRL прямо по нему.
+
+RevocationSet держит отозванные серийные номера из crl.pem в множестве:
+CRL разбирается один раз и перечитывается только при изменении файла
+(mtime/размер), так что проверка отзыва — stat и поиск в множестве.
+"""
+
+import datetime
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+INDEX_TIME_FORMAT = "%y%m%d%H%M%SZ"
+
+
+class IndexEntry(NamedTuple):
+    status: str  # V — действителен, R — отозван
+    not_after: datetime.datetime
+    revoked_at: datetime.datetime  # None, если не отозван
+    serial: int
+    subject: str
+
+    def line(self) -> str:
+        revoked = format_time(self.revoked_at) if self.revoked_at else ""
+        return "\t".join(
+            (self.status, format_time(self.not_after), revoked, f"{self.serial:02X}", "unknown", self.subject)
+        )
+
+
+def format_time(when: datetime.datetime) -> str:
+    return when.astimezone(datetime.timezone.utc).strftime(INDEX_TIME_FORMAT)
+
+
+def parse_time(text: str) -> datetime.datetime:
+    return datetime.datetime.strptime(text, INDEX_TIME_FORMAT).replace(tzinfo=datetime.timezone.utc)
+
+
+def read_index(path: Path) -> list:
+    entries = []
+    if not path.exists():
+        return entries
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        status, not_after, revoked, serial, _, subject = line.split("\t")
+        entries.append(
+            IndexEntry(
+                status,
+                parse_time(not_after),
+                parse_time(revoked.split(",")[0]) if revoked else None,
+                int(serial, 16),
+                subject,
+            )
+        )
+    return entries
+
+
+def write_index(path: Path, entries):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text("".join(e.line() + "\n" for e in entries), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def append_index(path: Path, entries):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(e.line() + "\n" for e in entries))
+
+
+def mark_revoked(entries, serial: int, when: datetime.datetime) -> list:
+    """Копия entries с отозванным serial; KeyError, если его нет в базе"""
+    result = []
+    found = False
+    for e in entries:
+        if e.serial == serial:
+            found = True
+            if e.status != "R":
+                e = e._replace(status="R", revoked_at=when)
+        result.append(e)
+    if not found:
+        raise KeyError(serial)
+    return result
+
+
+class RevocationSet:
+    def __init__(self, crl_path: Path, loader):
+        # loader(crl_bytes) -> множество отозванных серийных номеров
+        self.crl_path = Path(crl_path)
+        self.loader = loader
+        self._stamp = None
+        self._serials = frozenset()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def serials(self) -> frozenset:
+        try:
+            st = os.stat(self.crl_path)
+        except FileNotFoundError:
+            return frozenset()  # CRL ещё не выпущен — отозванных нет
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._serials = frozenset(self.loader(self.crl_path.read_bytes()))
+                    self._stamp = stamp
+                    self.loads += 1
+        return self._serials
+
+    def is_revoked(self, serial: int) -> bool:
+        return serial in self.serials()
@@ -0,0 +1,222 @@
+"""
+Режим serve: долгоживущий процесс PKI с API на локальном сокете.
+
+Ключ и сертификат CA, кэш открытых ключей, закрытые ключи пользователей и
+множество отозванных серийных номеров загружаются один раз и остаются в
+памяти. Протокол — JSON по строкам: запрос
+  {"id": 1, "op": "sign", "user": "alice", "file": "data.bin"}
+ответ
+  {"id": 1, "ok": true, "result": {...}}  или  {"id": 1, "ok": false, "error": "..."}
+Операции: ping, sign (user, file), verify (user, file, sig), issue (user,
+необязательно key_type), stats. Запросы одного соединения выполняются параллельно (ответы несут id);
+криптография идёт в пуле потоков, цикл asyncio только принимает запросы.
+Клиент — client.py.
+
+Доступ: Unix-сокет доступен только владельцу (0600). TCP-порт открыт всем
+локальным пользователям, поэтому в режиме --port каждый запрос несёт поле
+"token" — секрет из pki/ca/serve.token (файл 0600, создаётся при запуске).
+Имена пользователей проверяются (main.check_username), файлы и подписи
+допускаются только внутри files_dir и вне ./pki.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import digest
+import inprocess
+
+PRIVATE_KEY_CACHE_SIZE = 1024
+
+# Обязательные строковые поля каждой операции
+OP_FIELDS = {
+    "ping": (),
+    "sign": ("user", "file"),
+    "verify": ("user", "file", "sig"),
+    "issue": ("user",),
+    "stats": (),
+}
+
+
+def check_request(request) -> str:
+    """Имя операции; ValueError/KeyError, если запрос не по протоколу"""
+    if not isinstance(request, dict):
+        raise ValueError("запрос должен быть объектом JSON")
+    op = request.get("op")
+    if not isinstance(op, str):
+        raise ValueError("поле op должно быть строкой")
+    for field in OP_FIELDS[op]:
+        if not isinstance(request.get(field), str):
+            raise ValueError(f"поле {field} должно быть строкой")
+    for field in ("key_type", "token"):
+        if not isinstance(request.get(field), (str, type(None))):
+            raise ValueError(f"поле {field} должно быть строкой")
+    return op
+
+
+class PKIServer:
+    def __init__(self, pki, workers: int = None, files_dir: Path = None):
+        # pki — модуль main с уже выбранным бэкендом и путями ./pki
+        self.pki = pki
+        self.files_dir = Path(files_dir or Path.cwd()).resolve()
+        self.token = None  # задаётся в serve() для режима --port
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.ca = pki.load_ca()
+        self._private_keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.ops = {
+            "ping": self.ping,
+            "sign": self.sign,
+            "verify": self.verify,
+            "issue": self.issue,
+            "stats": self.stats,
+        }
+
+    # --- операции (выполняются в пуле потоков) ---
+
+    def ping(self, request):
+        return {}
+
+    def private_key(self, username: str):
+        # Закрытый ключ пользователя; перечитывается, если файл изменился
+        key_path = self.pki.PRIVATE_DIR / f"{username}.key.pem"
+        st = os.stat(key_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._private_keys.get(username)
+            if cached and cached[0] == stamp:
+                self._private_keys.move_to_end(username)
+                return cached[1]
+        key = inprocess.load_private_key(key_path)
+        with self._lock:
+            self._private_keys[username] = (stamp, key)
+            while len(self._private_keys) > PRIVATE_KEY_CACHE_SIZE:
+                self._private_keys.popitem(last=False)
+        return key
+
+    def path(self, name: str) -> Path:
+        # Путь клиента: внутри files_dir (после раскрытия симлинков) и не в ./pki
+        path = (self.files_dir / name).resolve()
+        if not path.is_relative_to(self.files_dir) or path.is_relative_to(self.pki.ROOT.resolve()):
+            raise ValueError(f"путь вне разрешённой папки {self.files_dir}: {name}")
+        return path
+
+    def sign(self, request):
+        filepath = self.path(request["file"])
+        sig = self.path(request["file"] + ".sig")
+        key = self.private_key(request["user"])
+        sig.write_bytes(inprocess.sign_digest(key, digest.sha256_file(filepath)))
+        return {"sig": str(sig)}
+
+    def verify(self, request):
+        filepath, sig = self.path(request["file"]), self.path(request["sig"])
+        result = self.pki.verify_triple(request["user"], str(filepath), str(sig))
+        return {k: v for k, v in result.items() if k in ("valid", "error")}
+
+    def issue(self, request):
+        key_type = request.get("key_type") or self.pki.keytypes.DEFAULT_USER_KEY_TYPE
+        user_key, user_cert = self.pki.create_user(request["user"], self.ca, key_type)
+        return {"key": str(user_key), "cert": str(user_cert)}
+
+    def stats(self, request):
+        cache = self.pki.pubkey_cache()
+        return {
+            "requests": self.requests,
+            "pubkey_hits": cache.hits,
+            "pubkey_misses": cache.misses,
+            "private_keys": len(self._private_keys),
+            "crl_loads": self.pki.revocation_set().loads,
+        }
+
+    # --- сеть ---
+
+    def call(self, request) -> dict:
+        # Ответ с id получает любой запрос, даже если операция упала
+        response = {"id": request.get("id") if isinstance(request, dict) else None}
+        try:
+            op = check_request(request)
+            if self.token and not hmac.compare_digest(
+                (request.get("token") or "").encode(), self.token.encode()
+            ):
+                raise ValueError("неверный токен (см. pki/ca/serve.token)")
+            if "user" in OP_FIELDS[op]:
+                self.pki.check_username(request["user"])
+            response["result"] = self.ops[op](request)
+            response["ok"] = True
+        except KeyError as e:
+            response.update(ok=False, error=f"нет поля или операции: {e}")
+        except (OSError, ValueError, SystemExit) as e:
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        return response
+
+    async def handle(self, request, writer):
+        self.requests += 1
+        if isinstance(request, dict) and request.get("op") == "ping":
+            response = self.call(request)  # без пула — минимальная задержка
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, self.call, request)
+        writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+
+    async def connection(self, reader, writer):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    writer.write(b'{"id": null, "ok": false, "error": "invalid JSON"}\n')
+                    continue
+                task = asyncio.create_task(self.handle(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                await writer.drain()
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Path = None, port: int = None):
+        if port:
+            self.token = secrets.token_hex(32)
+            token_path = self.pki.SERVE_TOKEN
+            token_path.unlink(missing_ok=True)
+            fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(self.token + "\n")
+            server = await asyncio.start_server(self.connection, "127.0.0.1", port)
+            where = f"127.0.0.1:{port}"
+        else:
+            socket_path = Path(socket_path)
+            if socket_path.exists():
+                socket_path.unlink()
+            server = await asyncio.start_unix_server(self.connection, str(socket_path))
+            socket_path.chmod(0o600)
+            where = str(socket_path)
+        print(f"PKI serve: {where} (бэкенд {self.pki.BACKEND})", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(pki, socket_path: Path = None, port: int = None, workers: int = None, files_dir=None):
+    pki.require_ca()
+    server = PKIServer(pki, workers, files_dir)
+    try:
+        asyncio.run(server.serve(socket_path, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=False)
@@ -3,65 +3,401 @@ ElGamal Digital Signature with MD5 Hash
 Laboratory Work #6
 """
 
-import random
 import math
-from hashlib import md5
+import queue
+import random
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import hashing
+from modexp import DEFAULT_WINDOW, FixedBase, jacobi, multi_exp
 
-def elgamal_sign_and_verify():
-    print("=== ElGamal Digital Signature with MD5 ===")
+BATCH_EXPONENT_BITS = 64  # a bad batch passes with probability ~2^-64
 
-    # 1. p and g (given in the task)
-    # Large 2048-bit prime p
-    p = 32317006071311007300153513477825163362488057133489075174588434139269806834136210002792056362640164685458556357935330816928829023080573472625273554742461245741026202527916572972862706300325263428213145766931414223654220941111348629991657478268034230553086349050635557712219187890332729569696129743856241741236237225197346402691855797767976823014625397933058015226858730761197532436467475855460715043896844940366130497697812854295958659597567051283852132784468522925504568272879113720098931873959143374175837826000278034973198552060607533234122603254684088120031105907484281003994966956119696956248629032338072839127039
+# Large 2048-bit prime p and generator g (given in the task)
+P = 32317006071311007300153513477825163362488057133489075174588434139269806834136210002792056362640164685458556357935330816928829023080573472625273554742461245741026202527916572972862706300325263428213145766931414223654220941111348629991657478268034230553086349050635557712219187890332729569696129743856241741236237225197346402691855797767976823014625397933058015226858730761197532436467475855460715043896844940366130497697812854295958659597567051283852132784468522925504568272879113720098931873959143374175837826000278034973198552060607533234122603254684088120031105907484281003994966956119696956248629032338072839127039
+G = 2
+
+
+class ElGamalKey:
+    """ElGamal key with fixed-base tables for g and y
+
+    g^k (signing) and g^H(m), y^r (verification) come from the precomputed
+    tables; without a table for y (precompute_y=False, e.g. for a key that
+    verifies only a few signatures) y^r * r^s is one Shamir multi-exponentiation.
+    The tables take about a second and several MB each, so a key used for a
+    single signature (precompute_g=False, precompute_y=False) uses plain pow.
+    """
+
+    def __init__(
+        self, p=P, g=G, x=None, y=None, window=DEFAULT_WINDOW, precompute_g=True, precompute_y=True
+    ):
+        self.p = p
+        self.g = g
+        self.x = x  # private key (None for a verification-only key)
+        self.y = pow(g, x, p) if y is None else y
+        self.window = window
+        self.g_table = FixedBase(g, p, window=window) if precompute_g else None
+        self.y_table = FixedBase(self.y, p, window=window) if precompute_y else None
+
+    def pow_g(self, exponent):
+        if self.g_table is not None:
+            return self.g_table.pow(exponent)
+        return pow(self.g, exponent, self.p)
+
+    @classmethod
+    def generate(cls, p=P, g=G, **kwargs):
+        return cls(p, g, x=2 + secrets.randbelow(p - 3), **kwargs)
+
+    def public_key(self, **kwargs):
+        return ElGamalKey(self.p, self.g, y=self.y, **kwargs)
+
+    def nonce(self):
+        """(r, k^-1, x*r*k^-1 mod p-1) for a fresh random k, r = g^k
+
+        Everything in s = (H(m) - x*r) * k^-1 that does not depend on the
+        message, so that signing with it is one multiply-add.
+        """
+        p = self.p
+        while True:
+            k = 2 + secrets.randbelow(p - 3)
+            if math.gcd(k, p - 1) == 1:
+                break
+        r = self.pow_g(k)
+        k_inv = pow(k, -1, p - 1)  # Modular inverse of k mod (p-1)
+        return r, k_inv, self.x * r * k_inv % (p - 1)
+
+    def sign(self, hm, nonce=None):
+        r, k_inv, xrk = nonce or self.nonce()
+        return r, (hm * k_inv - xrk) % (self.p - 1)
+
+    def verify(self, hm, r, s):
+        p = self.p
+        if not (0 < r < p and 0 <= s < p - 1):
+            return False
+        left = self.pow_g(hm % (p - 1))
+        if self.y_table is not None:
+            right = self.y_table.pow(r) * pow(r, s, p) % p
+        else:
+            right = multi_exp([(self.y, r), (r, s)], p)
+        return left == right
+
+    def verify_batch(self, items):
+        """Verify many (hm, r, s) under this key; returns one bool per item
+
+        Small exponent test: with random 64-bit c_i, all signatures are
+        valid (up to ~2^-64) iff
+            g^(sum c_i*hm_i) == y^(sum c_i*r_i) * prod r_i^(c_i*s_i)  (mod p)
+        where g and y come from the tables and the r_i part is a single
+        multi-exponentiation sharing its squarings. The test is sound only
+        inside the prime-order subgroup, so g, y and every r_i must be
+        quadratic residues (legitimate ones are, when g is); other items are
+        verified one by one. A failing batch is split in halves until the
+        bad signatures are isolated.
+        """
+        p = self.p
+        results = [False] * len(items)
+        in_subgroup = jacobi(self.g, p) == 1 and jacobi(self.y, p) == 1
+        batchable = []
+        for i, (hm, r, s) in enumerate(items):
+            if not (0 < r < p and 0 <= s < p - 1):
+                continue
+            if in_subgroup and jacobi(r, p) == 1:
+                batchable.append(i)
+            else:
+                results[i] = self.verify(hm, r, s)
+
+        pending = [batchable] if batchable else []
+        while pending:
+            indices = pending.pop()
+            if len(indices) == 1:
+                i = indices[0]
+                results[i] = self.verify(*items[i])
+            elif self._batch_equation([items[i] for i in indices]):
+                for i in indices:
+                    results[i] = True
+            else:
+                half = len(indices) // 2
+                pending += [indices[half:], indices[:half]]
+        return results
+
+    def _batch_equation(self, items):
+        p = self.p
+        q = p - 1
+        g_exp = y_exp = 0
+        r_pairs = []
+        for hm, r, s in items:
+            c = secrets.randbits(BATCH_EXPONENT_BITS) | 1
+            g_exp += c * hm
+            y_exp += c * r
+            r_pairs.append((r, c * s % q))
+        left = self.pow_g(g_exp % q)
+        y_part = self.y_table.pow(y_exp % q) if self.y_table is not None else pow(self.y, y_exp % q, p)
+        return left == y_part * multi_exp(r_pairs, p) % p
+
+
+def message_hash(m, hash_name="md5"):
+    return hashing.hash_bytes(hash_name, m).to_int()
+
+
+def file_hash(path, hash_name="md5"):
+    return hashing.hash_file(hash_name, path).to_int()
+
+
+_worker_key = None
+
+
+def _init_nonce_worker(p, g, x, window):
+    global _worker_key
+    _worker_key = ElGamalKey(p, g, x=x, window=window, precompute_y=False)
+
+
+def _nonce_batch(count):
+    return [_worker_key.nonce() for _ in range(count)]
+
+
+class NoncePool:
+    """Signing nonces computed ahead of time into a bounded queue
+
+    A background thread keeps the queue full, computing the nonces itself
+    (workers=0) or collecting batches from a process pool, so the big
+    exponentiations run on other cores instead of taking the GIL from the
+    signing thread. When the queue runs dry, get() computes a nonce inline.
+    """
+
+    def __init__(self, key, size=64, workers=0, batch=8):
+        self.key = key
+        self.queue = queue.Queue(maxsize=size)
+        self.batch = batch
+        self.workers = workers
+        self.misses = 0
+        self._stop = threading.Event()
+        self._executor = None
+        if workers:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_nonce_worker,
+                initargs=(key.p, key.g, key.x, key.window),
+            )
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, nonce):
+        while not self._stop.is_set():
+            try:
+                self.queue.put(nonce, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self):
+        if self._executor is None:
+            while self._put(self.key.nonce()):
+                pass
+            return
+        pending = [self._executor.submit(_nonce_batch, self.batch) for _ in range(self.workers)]
+        while not self._stop.is_set():
+            nonces = pending.pop(0).result()
+            pending.append(self._executor.submit(_nonce_batch, self.batch))
+            for nonce in nonces:
+                if not self._put(nonce):
+                    return
+
+    def get(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return self.key.nonce()
 
-    g = 2
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+
+class ElGamalSigner:
+    """Signs messages with pooled nonces: the hot path is the hash plus one multiply-add"""
+
+    def __init__(self, key, pool_size=64, workers=0, hash_name="md5"):
+        self.key = key
+        self.hash_name = hash_name
+        self.pool = NoncePool(key, pool_size, workers)
+
+    def sign(self, message):
+        return self.key.sign(message_hash(message, self.hash_name), self.pool.get())
+
+    def sign_file(self, path):
+        return self.key.sign(file_hash(path, self.hash_name), self.pool.get())
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ElGamalVerifier:
+    def __init__(self, public_key, hash_name="md5"):
+        self.key = public_key
+        self.hash_name = hash_name
+
+    def verify(self, message, signature):
+        r, s = signature
+        return self.key.verify(message_hash(message, self.hash_name), r, s)
+
+    def verify_file(self, path, signature):
+        r, s = signature
+        return self.key.verify(file_hash(path, self.hash_name), r, s)
+
+    def verify_batch(self, messages, signatures):
+        items = [(message_hash(m, self.hash_name), r, s) for m, (r, s) in zip(messages, signatures)]
+        return self.key.verify_batch(items)
+
+    def verify_files(self, paths, signatures, workers=None):
+        # Files are hashed on a thread pool, then verified as one batch
+        digests = [d.to_int() for _, d in hashing.digest_files(paths, self.hash_name, workers)]
+        return self.key.verify_batch([(hm, r, s) for hm, (r, s) in zip(digests, signatures)])
+
+
+def elgamal_sign_and_verify(hash_name="md5"):
+    print(f"=== ElGamal Digital Signature with {hash_name.upper()} ===")
+
+    # 1. p and g (given in the task)
+    p = P
+    g = G
 
     print(f"Prime p: {p} ({p.bit_length()} bits)")
     print(f"Generator g: {g}")
 
-    # 2. Private and public keys
-    x = random.randint(2, p - 2)  # private key
-    y = pow(g, x, p)  # public key
+    # 2. Private and public keys (one signature: no precomputed tables)
+    key = ElGamalKey.generate(p, g, precompute_g=False, precompute_y=False)
 
-    print(f"Private key x: {x}")
-    print(f"Public key y: {y}")
+    print(f"Private key x: {key.x}")
+    print(f"Public key y: {key.y}")
 
     # 3. Message
     m = b"This is a test message for digital signature demonstration in Laboratory Work #6"
     print(f"Message: {m.decode()}")
 
-    # 4. Hash with MD5
-    hash_obj = md5(m)
-    hm = int.from_bytes(hash_obj.digest(), "big")
-    print(f"MD5 hash (decimal): {hm}")
-
-    # 5. Choose k
-    while True:
-        k = random.randint(2, p - 2)
-        if math.gcd(k, p - 1) == 1:
-            break
-
-    print(f"Random k: {k}")
+    # 4. Hash (MD5 by default)
+    hm = message_hash(m, hash_name)
+    print(f"{hash_name.upper()} hash (decimal): {hm}")
 
-    # 6. Calculate signature
-    r = pow(g, k, p)
-    k_inv = pow(k, -1, p - 1)  # Modular inverse of k mod (p-1)
-    s = ((hm - x * r) * k_inv) % (p - 1)
+    # 5-6. Choose k and calculate signature
+    r, s = key.sign(hm)
 
     print(f"Signature (r, s): r={r}, s={s}")
 
     # 7. Verification
-    left = pow(g, hm, p)
-    right = (pow(y, r, p) * pow(r, s, p)) % p
-
-    is_valid = left == right
-    print(f"Verification: left={left}")
-    print(f"Verification: right={right}")
+    is_valid = key.verify(hm, r, s)
     print(f"Signature valid: {is_valid}")
 
     return is_valid
 
 
+def benchmark(count=10):
+    """Plain pow against the fixed-base tables and Shamir's trick"""
+    start = time.perf_counter()
+    key = ElGamalKey.generate()
+    print(f"tables for g and y:      {time.perf_counter() - start:8.2f} s")
+    p, g, x, y = key.p, key.g, key.x, key.y
+    hms = [message_hash(i.to_bytes(4, "big")) for i in range(count)]
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = [func(hm) for hm in hms]
+        elapsed = (time.perf_counter() - start) / count
+        print(f"{label:24} {elapsed * 1000:8.2f} ms")
+        return result
+
+    def plain_sign(hm):
+        while True:
+            k = random.randint(2, p - 2)
+            if math.gcd(k, p - 1) == 1:
+                break
+        r = pow(g, k, p)
+        return r, ((hm - x * r) * pow(k, -1, p - 1)) % (p - 1)
+
+    signatures = timed("sign, pow:", plain_sign)
+    timed("sign, fixed-base:", key.sign)
+    nonces = [key.nonce() for _ in range(count)]
+    timed("sign, pooled nonce:", lambda hm: key.sign(hm, nonces.pop()))
+
+    items = dict(zip(hms, signatures))
+    plain = timed(
+        "verify, pow:",
+        lambda hm: pow(g, hm, p) == pow(y, items[hm][0], p) * pow(items[hm][0], items[hm][1], p) % p,
+    )
+    tables = timed("verify, fixed-base:", lambda hm: key.verify(hm, *items[hm]))
+    shamir_key = key.public_key(precompute_y=False)
+    shamir = timed("verify, g table+Shamir:", lambda hm: shamir_key.verify(hm, *items[hm]))
+    assert all(plain) and all(tables) and all(shamir)
+
+
+def benchmark_batch(sizes=(1, 4, 16, 64), bad=2):
+    """Batch verification throughput, cross-checked against verify()"""
+    key = ElGamalKey.generate()
+    count = max(sizes)
+    hms = [message_hash(i.to_bytes(4, "big")) for i in range(count)]
+    nonces = [key.nonce() for _ in range(count)]
+    items = [(hm, *key.sign(hm, nonce)) for hm, nonce in zip(hms, nonces)]
+    for i in range(bad):  # a few forged signatures
+        hm, r, s = items[i * 7 % count]
+        items[i * 7 % count] = (hm, r, (s + 1) % (key.p - 1))
+
+    start = time.perf_counter()
+    expected = [key.verify(*item) for item in items]
+    single = count / (time.perf_counter() - start)
+    print(f"verify one by one:    {single:8.1f} signatures/sec")
+    for size in sizes:
+        start = time.perf_counter()
+        results = []
+        for i in range(0, count, size):
+            results += key.verify_batch(items[i : i + size])
+        rate = count / (time.perf_counter() - start)
+        assert results == expected
+        print(f"verify_batch({size:3}):    {rate:8.1f} signatures/sec")
+    print(f"cross-check: {count} results identical, {expected.count(False)} bad signatures found")
+
+
+def benchmark_latency(bursts=5, burst=20, pause=1.0, workers=0):
+    """Sign latency percentiles for bursty load, with and without a nonce pool"""
+    key = ElGamalKey.generate()
+    messages = [i.to_bytes(4, "big") for i in range(burst)]
+
+    def run(sign):
+        latencies = []
+        for _ in range(bursts):
+            time.sleep(pause)  # the pool refills between bursts
+            for m in messages:
+                start = time.perf_counter()
+                sign(m)
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]
+        return p50 * 1000, p99 * 1000
+
+    print("sign latency, no pool:  p50 %8.3f ms  p99 %8.3f ms" % run(lambda m: key.sign(message_hash(m))))
+    with ElGamalSigner(key, pool_size=burst, workers=workers) as signer:
+        print("sign latency, pooled:   p50 %8.3f ms  p99 %8.3f ms" % run(signer.sign))
+        print(f"pool misses: {signer.pool.misses}")
+
+
 if __name__ == "__main__":
-    elgamal_sign_and_verify()
+    if "--bench" in sys.argv:
+        benchmark()
+        benchmark_batch(bad=0)
+        benchmark_batch(bad=2)
+        benchmark_latency()
+    else:
+        elgamal_sign_and_verify()
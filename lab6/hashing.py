@@ -0,0 +1,136 @@
+"""
+Hash functions for the lab6 signatures
+
+One interface for MD2 (pycryptodome, kept for the RSA task), MD5 (kept for
+the ElGamal task), SHA-256, SHA-512 and BLAKE2b. The result is a Digest
+with .oid / .digest() / .digest_size, so it can be passed to pkcs1_15
+directly. Files are streamed through readinto into one reused buffer per
+thread; digest_files hashes many files on a thread pool (hashlib releases
+the GIL on large updates, so reading and hashing overlap across threads).
+
+python hashing.py [MB] prints a throughput table per algorithm.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from Crypto.Hash import MD2
+except ImportError:  # pycryptodome is not installed: no MD2
+    MD2 = None
+
+BUFFER_SIZE = 1 << 20
+
+# name -> (constructor, OID used in the PKCS#1 v1.5 DigestInfo)
+ALGORITHMS = {
+    "md2": (MD2.new if MD2 else None, "1.2.840.113549.2.2"),
+    "md5": (hashlib.md5, "1.2.840.113549.2.5"),
+    "sha256": (hashlib.sha256, "2.16.840.1.101.3.4.2.1"),
+    "sha512": (hashlib.sha512, "2.16.840.1.101.3.4.2.3"),
+    "blake2b": (hashlib.blake2b, "1.3.6.1.4.1.1722.12.2.1.16"),  # BLAKE2b-512
+}
+
+
+class Digest:
+    """A finished hash value, usable wherever pycryptodome expects a hash object"""
+
+    def __init__(self, name, value):
+        self.name = name
+        self.oid = ALGORITHMS[name][1]
+        self.value = value
+        self.digest_size = len(value)
+
+    def digest(self):
+        return self.value
+
+    def hexdigest(self):
+        return self.value.hex()
+
+    def to_int(self):
+        return int.from_bytes(self.value, "big")
+
+
+def new(name):
+    if name not in ALGORITHMS:
+        raise ValueError(f"Unknown hash algorithm: {name} (known: {', '.join(ALGORITHMS)})")
+    constructor = ALGORITHMS[name][0]
+    if constructor is None:
+        raise ValueError(f"{name} needs pycryptodome (pip install pycryptodome)")
+    return constructor()
+
+
+def hash_bytes(name, data):
+    h = new(name)
+    h.update(data)
+    return Digest(name, h.digest())
+
+
+_local = threading.local()
+
+
+def _buffer(size):
+    view = getattr(_local, "view", None)
+    if view is None or len(view) != size:
+        view = memoryview(bytearray(size))
+        _local.view = view
+    return view
+
+
+def hash_file(name, path, buffer_size=BUFFER_SIZE):
+    h = new(name)
+    view = _buffer(buffer_size)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            h.update(view[:n])
+    return Digest(name, h.digest())
+
+
+def digest_files(paths, name="sha256", workers=None):
+    """Yield (path, Digest) in input order, hashing on a thread pool"""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        yield from zip(paths, pool.map(lambda path: hash_file(name, path), paths))
+
+
+def available():
+    return [name for name, (constructor, _) in ALGORITHMS.items() if constructor is not None]
+
+
+def benchmark(size_mb=32, files=8):
+    """MB/s per algorithm: in memory, one streamed file, a pool over several files"""
+    data = os.urandom(size_mb << 20)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            path = os.path.join(tmp, f"part{i}")
+            with open(path, "wb") as f:
+                f.write(data[i * len(data) // files : (i + 1) * len(data) // files])
+            paths.append(path)
+        one_file = os.path.join(tmp, "whole")
+        with open(one_file, "wb") as f:
+            f.write(data)
+
+        print(f"{'algorithm':10} {'memory MB/s':>12} {'file MB/s':>10} {'pool MB/s':>10}")
+        for name in available():
+            rates = []
+            for run in (
+                lambda: hash_bytes(name, data),
+                lambda: hash_file(name, one_file),
+                lambda: list(digest_files(paths, name)),
+            ):
+                start = time.perf_counter()
+                run()
+                rates.append(size_mb / (time.perf_counter() - start))
+            print(f"{name:10} {rates[0]:12.1f} {rates[1]:10.1f} {rates[2]:10.1f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 32)
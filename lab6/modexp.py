@@ -0,0 +1,107 @@
+"""
+Modular exponentiation helpers for the lab6 signatures
+
+FixedBase precomputes base^(j * 2^(w*i)) for every w-bit window position i
+and digit j, so base^e needs one multiplication per non-zero window of e and
+no squarings at all (about 342 instead of ~2400 multiplications for a
+2048-bit exponent with w = 6). It pays off when the base is fixed: the
+generator g, or the public key y of one signer.
+
+multi_exp computes prod(b_i ^ e_i) with one shared chain of squarings
+(Shamir's trick / interleaved windows), so several exponentiations cost
+little more than one.
+
+jacobi is the Jacobi symbol, a cheap quadratic residuosity test.
+"""
+
+DEFAULT_WINDOW = 6
+
+
+def best_window(bits, bases=1):
+    """Window width minimizing table size plus multiplications for bits-bit exponents"""
+    return min(range(1, 9), key=lambda w: bases * ((1 << w) + bits / w))
+
+
+class FixedBase:
+    def __init__(self, base, modulus, bits=None, window=DEFAULT_WINDOW):
+        self.base = base % modulus
+        self.modulus = modulus
+        self.window = window
+        self.bits = bits or modulus.bit_length()
+
+        # table[i][j] = base^(j * 2^(w*i)) mod modulus
+        self.table = []
+        row_base = self.base
+        for _ in range(-(-self.bits // window)):
+            row = [1, row_base]
+            for _ in range(2, 1 << window):
+                row.append(row[-1] * row_base % modulus)
+            self.table.append(row)
+            row_base = row[-1] * row_base % modulus
+
+    def pow(self, exponent):
+        if exponent < 0 or exponent.bit_length() > self.bits:
+            return pow(self.base, exponent, self.modulus)
+        m = self.modulus
+        w = self.window
+        mask = (1 << w) - 1
+        result = 1
+        for row in self.table:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % m
+            exponent >>= w
+        return result
+
+
+def multi_exp(pairs, modulus, window=None):
+    """prod(base ^ exponent) mod modulus for (base, exponent) pairs
+
+    Left-to-right fixed windows, interleaved over all bases: every window
+    position costs w squarings for the whole product plus one multiplication
+    per base with a non-zero digit.
+    """
+    pairs = [(b % modulus, e) for b, e in pairs if e]
+    if not pairs:
+        return 1 % modulus
+    if any(e < 0 for _, e in pairs):
+        raise ValueError("multi_exp needs non-negative exponents")
+    bits = max(e.bit_length() for _, e in pairs)
+    w = window or best_window(bits, len(pairs))
+    mask = (1 << w) - 1
+
+    tables = []
+    for base, _ in pairs:
+        row = [1, base]
+        for _ in range(2, 1 << w):
+            row.append(row[-1] * base % modulus)
+        tables.append(row)
+
+    result = 1
+    for shift in range((bits - 1) // w * w, -1, -w):
+        if result != 1:
+            for _ in range(w):
+                result = result * result % modulus
+        for (_, e), row in zip(pairs, tables):
+            digit = (e >> shift) & mask
+            if digit:
+                result = result * row[digit] % modulus
+    return result
+
+
+def jacobi(a, n):
+    """Jacobi symbol (a/n) for odd n > 0; for prime n, 1 iff a is a quadratic residue"""
+    a %= n
+    result = 1
+    while a:
+        zeros = (a & -a).bit_length() - 1
+        a >>= zeros
+        if zeros & 1 and n & 7 in (3, 5):
+            result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
@@ -1,13 +1,149 @@
+"""
+RSA Digital Signature with MD2 Hash
+Laboratory Work #6
+
+Keys are generated once and kept in ./keys (PEM or DER); parsed key objects
+are cached. CRTKey is a pure-Python PKCS#1 v1.5 signer with precomputed
+dP, dQ, qInv for comparison with pycryptodome (python rsa_signature.py --bench).
+"""
+
+import sys
+import time
+from pathlib import Path
+
 from Crypto.PublicKey import RSA
-from Crypto.Hash import MD2
 from Crypto.Signature import pkcs1_15
+from Crypto.Util.asn1 import DerNull, DerObjectId, DerOctetString, DerSequence
+
+import hashing
+
+KEYS_DIR = Path.cwd() / "keys"
+
+
+class RSAKeyStore:
+    """Keys by name in one directory, generated on first use
+
+    A key is parsed once and cached with the file's mtime, so repeated
+    get() calls return the same object until the file changes.
+    """
+
+    def __init__(self, directory=KEYS_DIR):
+        self.directory = Path(directory)
+        self._cache = {}
+
+    def path(self, name, fmt="PEM"):
+        return self.directory / f"{name}.{fmt.lower()}"
+
+    def load(self, path):
+        path = Path(path)
+        mtime = path.stat().st_mtime_ns
+        cached = self._cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, RSA.import_key(path.read_bytes()))  # PEM or DER
+            self._cache[path] = cached
+        return cached[1]
+
+    def save(self, key, path, fmt="PEM"):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(key.export_key(format=fmt))
+        path.chmod(0o600)
+        self._cache.pop(path, None)
+
+    def get(self, name, bits=3072, fmt="PEM"):
+        for candidate in (self.path(name, fmt), self.path(name, "DER" if fmt == "PEM" else "PEM")):
+            if candidate.exists():
+                return self.load(candidate)
+        key = RSA.generate(bits)
+        self.save(key, self.path(name, fmt), fmt)
+        return self.load(self.path(name, fmt))
+
+
+class RSASigner:
+    """One pkcs1_15 signer object reused for every signature"""
+
+    def __init__(self, key, hash_name="md2"):
+        self.key = key
+        self.hash_name = hash_name
+        self.signer = pkcs1_15.new(key)
+
+    def sign(self, h):
+        return self.signer.sign(h)
+
+    def sign_message(self, m):
+        return self.sign(hashing.hash_bytes(self.hash_name, m))
+
+    def sign_file(self, path):
+        return self.sign(hashing.hash_file(self.hash_name, path))
+
 
+class RSAVerifier:
+    def __init__(self, public_key, hash_name="md2"):
+        self.hash_name = hash_name
+        self.verifier = pkcs1_15.new(public_key)
 
-def rsa_sign_and_verify():
-    print("=== RSA Digital Signature with MD2 ===")
+    def verify(self, h, signature):
+        try:
+            self.verifier.verify(h, signature)
+            return True
+        except ValueError:
+            return False
 
-    # 1. Generate RSA keys (3072 bits as required)
-    key = RSA.generate(3072)
+    def verify_message(self, m, signature):
+        return self.verify(hashing.hash_bytes(self.hash_name, m), signature)
+
+    def verify_file(self, path, signature):
+        return self.verify(hashing.hash_file(self.hash_name, path), signature)
+
+
+def digest_info(h):
+    """DER DigestInfo of a hash object (what PKCS#1 v1.5 signs)"""
+    algorithm = DerSequence([DerObjectId(h.oid).encode(), DerNull().encode()]).encode()
+    return DerSequence([algorithm, DerOctetString(h.digest()).encode()]).encode()
+
+
+class CRTKey:
+    """Pure-Python RSA signing via the Chinese remainder theorem
+
+    Two half-size exponentiations with dP = d mod (p-1), dQ = d mod (q-1)
+    and the recombination qInv = q^-1 mod p replace one full pow(m, d, n).
+    """
+
+    def __init__(self, key):
+        self.n, self.e, self.d = key.n, key.e, key.d
+        self.p, self.q = key.p, key.q
+        self.dp = self.d % (self.p - 1)
+        self.dq = self.d % (self.q - 1)
+        self.q_inv = pow(self.q, -1, self.p)
+        self.size = (self.n.bit_length() + 7) // 8
+
+    def encode(self, h):
+        # EMSA-PKCS1-v1_5: 00 01 FF..FF 00 DigestInfo
+        t = digest_info(h)
+        if len(t) + 11 > self.size:
+            raise ValueError("Key too short for this digest")
+        return int.from_bytes(b"\x00\x01" + b"\xff" * (self.size - len(t) - 3) + b"\x00" + t, "big")
+
+    def sign(self, h):
+        m = self.encode(h)
+        s1 = pow(m, self.dp, self.p)
+        s2 = pow(m, self.dq, self.q)
+        s = s2 + (self.q_inv * (s1 - s2) % self.p) * self.q
+        return s.to_bytes(self.size, "big")
+
+    def sign_without_crt(self, h):
+        return pow(self.encode(h), self.d, self.n).to_bytes(self.size, "big")
+
+    def verify(self, h, signature):
+        s = int.from_bytes(signature, "big")
+        return s < self.n and pow(s, self.e, self.n) == self.encode(h)
+
+
+def rsa_sign_and_verify(store=None, hash_name="md2"):
+    print(f"=== RSA Digital Signature with {hash_name.upper()} ===")
+
+    # 1. RSA keys (3072 bits as required), generated once and then loaded
+    key = (store or RSAKeyStore()).get("lab6_rsa", 3072)
     private_key = key
     public_key = key.publickey()
 
@@ -50,23 +186,59 @@ def rsa_sign_and_verify():
 
     print(f"Message: {m.decode()}")
 
-    # 3. Hash with MD2
-    h = MD2.new(m)
-    print(f"MD2 hash: {h.hexdigest()}")
+    # 3. Hash (MD2 by default)
+    h = hashing.hash_bytes(hash_name, m)
+    print(f"{hash_name.upper()} hash: {h.hexdigest()}")
 
     # 4. Sign the hash
-    signature = pkcs1_15.new(private_key).sign(h)
+    signature = RSASigner(private_key, hash_name).sign(h)
     print(f"Signature (hex): {signature.hex()}")
 
     # 5. Verify signature
-    try:
-        pkcs1_15.new(public_key).verify(h, signature)
+    if RSAVerifier(public_key, hash_name).verify(h, signature):
         print("Signature verification: SUCCESS")
         return True
-    except Exception as e:
-        print(f"Signature verification: FAILED - {e}")
-        return False
+    print("Signature verification: FAILED")
+    return False
+
+
+def benchmark(sizes=(2048, 3072, 4096), seconds=1.0, store=None):
+    """Signatures and verifications per second per key size"""
+    store = store or RSAKeyStore()
+    h = hashing.hash_bytes("sha256", b"benchmark message")
+
+    def rate(func):
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            func()
+            count += 1
+        return count / (time.perf_counter() - start)
+
+    print(f"{'bits':>5} {'keygen s':>9} {'load ms':>8} {'sign/s':>8} {'CRT py/s':>9} {'no-CRT/s':>9} {'verify/s':>9}")
+    for bits in sizes:
+        name = f"bench_rsa{bits}"
+        fresh = not store.path(name).exists()
+        start = time.perf_counter()
+        key = store.get(name, bits)
+        keygen = time.perf_counter() - start if fresh else float("nan")
+        start = time.perf_counter()
+        RSA.import_key(store.path(name).read_bytes())
+        load = time.perf_counter() - start
+
+        signer, verifier, crt = RSASigner(key), RSAVerifier(key.publickey()), CRTKey(key)
+        signature = signer.sign(h)
+        assert crt.sign(h) == signature == crt.sign_without_crt(h)
+        assert verifier.verify(h, signature) and crt.verify(h, signature)
+        print(
+            f"{bits:5} {keygen:9.2f} {load * 1000:8.2f} {rate(lambda: signer.sign(h)):8.0f} "
+            f"{rate(lambda: crt.sign(h)):9.0f} {rate(lambda: crt.sign_without_crt(h)):9.0f} "
+            f"{rate(lambda: verifier.verify(h, signature)):9.0f}"
+        )
 
 
 if __name__ == "__main__":
-    rsa_sign_and_verify()
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        rsa_sign_and_verify()